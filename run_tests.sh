@@ -15,43 +15,90 @@ print_message () {
 }
 
 
-if python -m flake8 --config=setup.cfg 1>&2;
-then
-    print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
-    echo $LF 1>&2
-    if python structure_test.py
-    then
-        cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
-        if pytest --tb=line 1>&2;
-        then
-            cd ../ya_note
-            unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
-            if pytest --tb=line 1>&2;
-            then
-                exit 0
-            else
-                status=$?
-                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
-                echo \`\`\` 1>&2
-                exit $status
-            fi
-        else
-            status=$?
-            print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
-            echo \`\`\` 1>&2
-            exit $status
-        fi
-    else
-        status=$?
-        print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
-        echo \`\`\` 1>&2
-        exit $status
-    fi
-else
-    status=$?
+run_project () {
+    # Run the tests of the project in directory $1 with settings module $2 in
+    # the background. With several workers pytest-xdist splits the tests by
+    # $3 (loadfile, loadscope); every worker gets its own test database.
+    # Output and JUnit report go to the $reports directory.
+    local options=(--tb=line --junitxml="$reports/$1.xml")
+    if [[ $workers -gt 1 ]]; then options+=(-n "$workers" --dist "$3"); fi
+    (cd "$1" && DJANGO_SETTINGS_MODULE="$2" python -m pytest "${options[@]}") \
+        >"$reports/$1.log" 2>&1 &
+}
+
+merge_reports () {
+    # Print the totals of both projects and write the merged JUnit report
+    # to $TEST_REPORT if it is set.
+    python - "$reports" "${TEST_REPORT:-}" <<'PYTHON'
+import sys
+from pathlib import Path
+from xml.etree import ElementTree
+
+reports, target = Path(sys.argv[1]), sys.argv[2]
+merged = ElementTree.Element('testsuites')
+for path in sorted(reports.glob('*.xml')):
+    merged.extend(ElementTree.parse(path).getroot().iter('testsuite'))
+totals = {
+    name: sum(int(suite.get(name, 0)) for suite in merged)
+    for name in ('tests', 'failures', 'errors', 'skipped')
+}
+print(
+    'Итого: тестов {tests}, упало {failures}, ошибок {errors}, '
+    'пропущено {skipped}'.format(**totals)
+)
+if target:
+    ElementTree.ElementTree(merged).write(
+        target, encoding='utf-8', xml_declaration=True
+    )
+PYTHON
+}
+
+
+python -m flake8 --config=setup.cfg 1>&2
+status=$?
+if [[ $status -ne 0 ]]; then
     print_message " flake8 обнаружил отклонения от стандартов, приведите код в соответствие с PEP8 " "=" 1
     echo \`\`\` 1>&2
     exit $status
 fi
+print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
+echo $LF 1>&2
+
+python structure_test.py
+status=$?
+if [[ $status -ne 0 ]]; then
+    print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
+    echo \`\`\` 1>&2
+    exit $status
+fi
+
+# Both projects are tested at the same time, the cores are shared between
+# them. TEST_WORKERS sets the number of pytest-xdist workers per project.
+workers=${TEST_WORKERS:-$(( $(nproc) / 2 ))}
+if ! python -c "import xdist" 2>/dev/null; then workers=1; fi
+reports=$(mktemp -d)
+trap 'rm -rf "$reports"' EXIT
+
+run_project ya_news "${DJANGO_SETTINGS_MODULE:-yanews.settings}" loadfile
+news_pid=$!
+run_project ya_note yanote.settings loadscope
+note_pid=$!
+wait $news_pid
+news_status=$?
+wait $note_pid
+note_status=$?
+
+cat "$reports/ya_news.log" "$reports/ya_note.log" 1>&2
+merge_reports 1>&2
+
+if [[ $news_status -ne 0 ]]; then
+    print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+fi
+if [[ $note_status -ne 0 ]]; then
+    print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+fi
+if [[ $news_status -ne 0 || $note_status -ne 0 ]]; then
+    echo \`\`\` 1>&2
+    exit $(( news_status ? news_status : note_status ))
+fi
+exit 0
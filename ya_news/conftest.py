@@ -1,19 +1,43 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import pytest
 
 from django.conf import settings
-from django.utils import timezone
+from django.core.cache import cache
 
-
-from news.models import News, Comment
+from news.factories import make_comments, make_news
+from news.forms import bad_words
+from news.models import ModerationTerm, News, Comment
 
 NEW_TEXT = 'Новый текст'
 TITLE = 'Заголовок'
 TEXT_NEWS = 'Текст новости'
 TEXT_COMMENT = 'Текст комментария'
-NEWS = 'Новость'
 TEXT = 'Текст'
+MODERATION_TERM = 'бяка'
+BENCHMARK_NEWS_COUNT = 10
+BENCHMARK_COMMENTS_PER_NEWS = 50_000
+# Чтение сессии из базы: только движок db не держит сессию в кэше.
+SESSION_QUERIES = int(
+    settings.SESSION_ENGINE == settings.SESSION_ENGINES['db']
+)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def moderation_dictionary(django_db_setup, django_db_blocker):
+    """Словарь модерации собран до первого запроса, как при старте процесса"""
+    with django_db_blocker.unblock():
+        bad_words.reload()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Чистый кэш для каждого теста; снимок словаря модерации в нём
+    остаётся, как у работающего сайта
+    """
+    cache.clear()
+    bad_words.publish()
 
 
 @pytest.fixture
@@ -59,30 +83,29 @@ def comment(news, author):
 
 @pytest.fixture
 def list_news():
-    """Список новостей"""
-    today, news_list = datetime.today(), []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE):
-        test_news = News.objects.create(
-            title=f'{NEWS} {index}',
-            text=TEXT_NEWS,
-        )
-        test_news.date = today - timedelta(days=index)
-        test_news.save()
-        news_list.append(test_news)
-    return news_list
+    """Список новостей, от самой свежей к самой старой"""
+    return list(make_news(settings.NEWS_COUNT_ON_HOME_PAGE))
 
 
 @pytest.fixture
 def list_comments(news, author):
-    """Список комментариев"""
-    now, comment_list = timezone.now(), []
-    for index in range(2):
-        test_comment = Comment.objects.create(
-            author=author,
-            news=news,
-            text=f'{TEXT} {index}',
-        )
-        test_comment.created = now + timedelta(days=index)
-        test_comment.save()
-        comment_list.append(test_comment)
-    return comment_list
+    """Список комментариев, от старого к новому"""
+    return list(make_comments([news], [author], 2))
+
+
+@pytest.fixture
+def news_with_many_comments(author):
+    """Новости с большим количеством комментариев для бенчмарков"""
+    news_list = list(make_news(BENCHMARK_NEWS_COUNT))
+    make_comments(news_list, [author], BENCHMARK_COMMENTS_PER_NEWS)
+    return news_list
+
+
+@pytest.fixture
+def moderation_term(django_capture_on_commit_callbacks):
+    """Запрещённое слово, добавленное через базу данных"""
+    with django_capture_on_commit_callbacks(execute=True):
+        term = ModerationTerm.objects.create(word=MODERATION_TERM)
+    yield term
+    term.delete()
+    bad_words.reload()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, News
+from .counters import recount_comments
+from .models import Comment, ModerationTerm, News
 
 
 class CommentInline(admin.StackedInline):
@@ -13,3 +14,18 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    readonly_fields = ('comment_count',)
+
+    def save_related(self, request, form, formsets, change):
+        """
+        В инлайне можно поменять статус комментария, поэтому после
+        сохранения счётчик новости пересчитывается.
+        """
+        super().save_related(request, form, formsets, change)
+        recount_comments(News.objects.filter(pk=form.instance.pk))
+
+
+@admin.register(ModerationTerm)
+class ModerationTermAdmin(admin.ModelAdmin):
+    list_display = ('word', 'updated')
+    search_fields = ('word',)
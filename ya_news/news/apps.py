@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from yanews import sessions  # noqa: F401
+        from yanews.cache import is_shared
+
+        from . import signals  # noqa: F401
+        from .forms import bad_words
+        from .pipeline import check_moderation_queue
+        checks.register(check_moderation_queue, checks.Tags.caches)
+        if is_shared():
+            bad_words.load_snapshot()
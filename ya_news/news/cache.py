@@ -0,0 +1,50 @@
+"""Кэш отрендеренных фрагментов страницы новости."""
+import time
+
+from yanews.cache import NamespacedCache
+
+VERSION_KEY = 'detail:{pk}:version'
+FRAGMENT_KEY = 'detail:{pk}:{version}:{name}'
+
+news_cache = NamespacedCache('news')
+
+
+def get_version(news_pk):
+    """Текущая версия фрагментов новости, создаётся при первом обращении."""
+    key = VERSION_KEY.format(pk=news_pk)
+    version = news_cache.get(key)
+    if version is None:
+        news_cache.add(key, time.time_ns(), timeout=None)
+        version = news_cache.get(key)
+    return version
+
+
+def bump_version(news_pk):
+    """
+    Делает недействительными все фрагменты новости.
+
+    Вместо удаления ключей меняем версию: старые фрагменты просто перестают
+    читаться и вытесняются по таймауту.
+    """
+    news_cache.set(
+        VERSION_KEY.format(pk=news_pk), time.time_ns(), timeout=None
+    )
+
+
+def get_fragments(news_pk, version, names):
+    """Возвращает словарь найденных в кэше фрагментов."""
+    keys = {
+        FRAGMENT_KEY.format(pk=news_pk, version=version, name=name): name
+        for name in names
+    }
+    return {
+        keys[key]: fragment
+        for key, fragment in news_cache.get_many(keys).items()
+    }
+
+
+def get_or_render_fragment(news_pk, version, name, render):
+    """Рендерит недостающий фрагмент, не допуская параллельных пересчётов."""
+    return news_cache.get_or_compute(
+        FRAGMENT_KEY.format(pk=news_pk, version=version, name=name), render
+    )
@@ -0,0 +1,50 @@
+"""
+Счётчик опубликованных комментариев News.comment_count.
+
+Счётчик меняется атомарными UPDATE с F() вместе с самим комментарием,
+поэтому главная страница читает готовое число и не обращается к таблице
+комментариев. recount_comments пересчитывает счётчик по базе данных
+и исправляет расхождения, если они накопились.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, News
+
+
+def change_comment_count(news_pk, delta):
+    """Сдвигает счётчик новости на delta одним запросом."""
+    News.objects.filter(pk=news_pk).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def published_count():
+    """Подзапрос с числом опубликованных комментариев новости."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(
+                news=OuterRef('pk'), status=Comment.Status.PUBLISHED
+            ).order_by().values('news').annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_comments(news=None):
+    """
+    Пересчитывает счётчик у новостей из news (по умолчанию у всех).
+
+    Обновляются только новости с расхождением; возвращается их число.
+    """
+    if news is None:
+        news = News.objects.all()
+    drifted = news.annotate(actual=published_count()).exclude(
+        comment_count=F('actual')
+    )
+    return News.objects.filter(pk__in=drifted.values('pk')).update(
+        comment_count=published_count()
+    )
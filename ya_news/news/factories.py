@@ -0,0 +1,66 @@
+"""
+Фабрики новостей и комментариев для тестов и замеров.
+
+Строки вставляются пачкой через yanews.factories.insert_rows. Счётчики
+comment_count и версии кэша страниц новостей обновляются сразу,
+поисковый индекс не строится: если он нужен, вызывается
+news.search.rebuild_index().
+"""
+from datetime import timedelta
+
+from django.db.models import F
+
+from yanews.factories import START, Series, insert_rows
+
+from .cache import bump_version
+from .models import Comment, News
+
+NEWS_TITLE = 'Новость'
+NEWS_TEXT = 'Текст новости'
+COMMENT_TEXT = 'Текст'
+
+
+def make_news(count, start=START, step=timedelta(days=-1), **values):
+    """
+    Создаёт count новостей «Новость 0», «Новость 1» и так далее.
+
+    i-я новость датирована start + i * step: по умолчанию каждая
+    следующая на день старше, и порядок совпадает с главной страницей.
+    """
+    return insert_rows(News, count, **{
+        'title': lambda index: f'{NEWS_TITLE} {index}',
+        'text': NEWS_TEXT,
+        'date': Series(start.date(), step),
+        'modified': Series(start, step),
+        **values,
+    })
+
+
+def make_comments(
+    news, authors, per_news, start=START, step=timedelta(minutes=1),
+    status=Comment.Status.PUBLISHED, **values,
+):
+    """
+    Создаёт по per_news комментариев к каждой новости из news.
+
+    Авторы берутся из authors по кругу, комментарии новости созданы
+    с шагом step начиная со start. Счётчики новостей увеличиваются
+    одним UPDATE, если комментарии опубликованы.
+    """
+    news_pks = [item.pk for item in news]
+    author_pks = [author.pk for author in authors]
+    comments = insert_rows(Comment, len(news_pks) * per_news, **{
+        'news_id': lambda index: news_pks[index // per_news],
+        'author_id': lambda index: author_pks[index % len(author_pks)],
+        'text': lambda index: f'{COMMENT_TEXT} {index % per_news}',
+        'created': Series(start, step, per_news),
+        'status': status,
+        **values,
+    })
+    if status == Comment.Status.PUBLISHED:
+        News.objects.filter(pk__in=news_pks).update(
+            comment_count=F('comment_count') + per_news
+        )
+    for news_pk in news_pks:
+        bump_version(news_pk)
+    return comments
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import FORMATS, SOURCES, parse_since, render_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает новости или комментарии в CSV или JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=tuple(SOURCES))
+        parser.add_argument(
+            '--format', choices=FORMATS, default='jsonl',
+            help='Формат выгрузки.',
+        )
+        parser.add_argument(
+            '--since',
+            help=(
+                'Выгрузить только строки, созданные (новости — изменённые) '
+                'начиная с этого момента, в формате ISO 8601.'
+            ),
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, kind, format, since, output, **options):
+        if since is not None:
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+        lines = render_lines(kind, format, since)
+        if output is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(lines)
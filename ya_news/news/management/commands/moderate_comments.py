@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from news.pipeline import run_worker, worker_process
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики очереди модерации комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько комментариев обрабатывать за один проход.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.',
+        )
+
+    def handle(self, *args, workers, batch_size, once, **options):
+        if workers == 1:
+            processed = run_worker(0, 1, batch_size, once)
+            self.stdout.write(f'Обработано комментариев: {processed}')
+            return
+        # Дочерние процессы открывают собственные соединения с базой.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(
+                    os.environ['DJANGO_SETTINGS_MODULE'],
+                    worker, workers, batch_size, once,
+                ),
+            )
+            for worker in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.stdout.write(f'Обработчиков завершено: {workers}')
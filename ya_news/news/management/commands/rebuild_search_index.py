@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковый индекс новостей и комментариев заново.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько документов индексировать за одну транзакцию.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        documents = rebuild_index(batch_size)
+        self.stdout.write(f'Проиндексировано документов: {documents}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from news.counters import recount_comments
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'news', nargs='*', type=int,
+            help='Номера новостей; по умолчанию пересчитываются все.',
+        )
+
+    def handle(self, *args, news, **options):
+        queryset = News.objects.all()
+        if news:
+            queryset = queryset.filter(pk__in=news)
+        fixed = recount_comments(queryset)
+        self.stdout.write(f'Исправлено счётчиков: {fixed}')
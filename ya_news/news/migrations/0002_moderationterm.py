@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationTerm',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'word',
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name='Слово'
+                    ),
+                ),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Запрещённое слово',
+                'verbose_name_plural': 'Запрещённые слова',
+                'ordering': ('word',),
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_moderationterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(
+                choices=[
+                    ('pending', 'На модерации'),
+                    ('published', 'Опубликован'),
+                    ('hidden', 'Скрыт'),
+                ],
+                db_index=True,
+                default='published',
+                max_length=10,
+                verbose_name='Статус',
+            ),
+        ),
+    ]
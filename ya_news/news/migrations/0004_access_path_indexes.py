@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0003_comment_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='news',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to='news.news',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['news', 'created', 'id'],
+                name='comment_news_created_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['author', 'created'], name='comment_author_created_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['date', 'id'], name='news_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:20
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_count(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    published = (
+        Comment.objects.filter(news=OuterRef('pk'), status='published')
+        .order_by()
+        .values('news')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    News.objects.update(
+        comment_count=Coalesce(
+            Subquery(published, output_field=IntegerField()), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Комментариев'
+            ),
+        ),
+        migrations.RunPython(fill_comment_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+    ]
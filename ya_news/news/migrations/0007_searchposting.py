@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'term',
+                    models.CharField(
+                        max_length=64, verbose_name='Основа слова'
+                    ),
+                ),
+                (
+                    'kind',
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, 'Новость'), (2, 'Комментарий')]
+                    ),
+                ),
+                ('object_id', models.PositiveIntegerField()),
+                ('news_id', models.PositiveIntegerField()),
+                ('weight', models.FloatField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(
+                fields=['term', 'weight', 'kind', 'object_id', 'news_id'],
+                name='posting_term_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(
+                fields=['kind', 'object_id'], name='posting_document_idx'
+            ),
+        ),
+    ]
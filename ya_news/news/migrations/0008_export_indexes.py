@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_searchposting'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(
+                fields=['created', 'id'], name='comment_created_id_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(
+                fields=['modified', 'id'], name='news_modified_id_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_export_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(fields=['news_id'], name='posting_news_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_posting_news_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='searchposting',
+            name='posting_document_idx',
+        ),
+        migrations.AddIndex(
+            model_name='searchposting',
+            index=models.Index(
+                fields=['kind', 'object_id', 'term', 'weight'],
+                name='posting_document_idx',
+            ),
+        ),
+    ]
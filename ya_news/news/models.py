@@ -8,9 +8,19 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False
+    )
+    modified = models.DateTimeField('Изменена', auto_now=True)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+            models.Index(
+                fields=('modified', 'id'), name='news_modified_id_idx'
+            ),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -19,16 +29,99 @@ class News(models.Model):
 
 
 class Comment(models.Model):
-    news = models.ForeignKey(News, on_delete=models.CASCADE)
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        PUBLISHED = 'published', 'Опубликован'
+        HIDDEN = 'hidden', 'Скрыт'
+
+    # Одиночные индексы внешних ключей не нужны: их заменяют составные
+    # индексы из Meta, которые начинаются с тех же столбцов.
+    news = models.ForeignKey(News, on_delete=models.CASCADE, db_index=False)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PUBLISHED,
+        db_index=True,
+    )
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='comment_author_created_idx',
+            ),
+            models.Index(
+                fields=('created', 'id'), name='comment_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class ModerationTerm(models.Model):
+    word = models.CharField('Слово', max_length=100, unique=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('word',)
+        verbose_name_plural = 'Запрещённые слова'
+        verbose_name = 'Запрещённое слово'
+
+    def __str__(self):
+        return self.word
+
+
+class SearchPosting(models.Model):
+    """
+    Строка инвертированного индекса: основа слова в документе.
+
+    Документ — новость или опубликованный комментарий. Ссылки на документ
+    хранятся числами, а не внешними ключами, чтобы удаление новости с
+    тысячами комментариев не собирало строки индекса по одной.
+    """
+
+    class Kind(models.IntegerChoices):
+        NEWS = 1, 'Новость'
+        COMMENT = 2, 'Комментарий'
+
+    term = models.CharField('Основа слова', max_length=64)
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    object_id = models.PositiveIntegerField()
+    news_id = models.PositiveIntegerField()
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = (
+            # Покрывающий индекс: поиск не читает саму таблицу, а лучшие
+            # документы для одного слова идут в нём первыми.
+            models.Index(
+                fields=('term', 'weight', 'kind', 'object_id', 'news_id'),
+                name='posting_term_idx',
+            ),
+            # Основы документа: удаление документа из индекса и проверка,
+            # что в документе есть остальные слова запроса.
+            models.Index(
+                fields=('kind', 'object_id', 'term', 'weight'),
+                name='posting_document_idx',
+            ),
+            # Удаление новости убирает из индекса и её комментарии.
+            models.Index(fields=('news_id',), name='posting_news_idx'),
+        )
+
+    def __str__(self):
+        return self.term
@@ -0,0 +1,174 @@
+"""
+Поиск запрещённых слов в тексте за один проход (автомат Ахо — Корасик).
+
+Словарь складывается из встроенного списка и слов ModerationTerm, которые
+редактируются в админке. Каждый процесс держит скомпилированный автомат
+в памяти. Изменение слов перестраивает автомат в процессе, где оно
+сделано, и кладёт в общий кэш снимок автомата и его версию. Остальные
+процессы раз в MODERATION_REFRESH_INTERVAL секунд сверяют свою версию
+с версией в кэше и при расхождении загружают снимок, так что проверка
+комментария не обращается к базе данных. Новый процесс загружает снимок
+при старте, а если его ещё нет — собирает автомат в yanews.wsgi, до
+первого запроса.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .cache import news_cache
+
+# Латинские буквы и цифры, похожие на кириллические: «peдиcкa» → «редиска».
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'u': 'и', 'x': 'х', 'y': 'у',
+    '0': 'о', '3': 'з', 'ё': 'е',
+})
+
+
+class Matcher:
+    """
+    Автомат для поиска любого слова из списка.
+
+    Строится один раз, после чего проверка текста занимает один линейный
+    проход независимо от размера словаря. С word_boundary совпадение
+    засчитывается только для целого слова, с homoglyphs латинские двойники
+    кириллических букв приводятся к кириллице и в словаре, и в тексте.
+    """
+
+    def __init__(self, words, word_boundary=False, homoglyphs=False):
+        self.word_boundary = word_boundary
+        self.homoglyphs = homoglyphs
+        self.words = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for word in words:
+            self._add(self.normalize(word))
+        self._link()
+
+    def normalize(self, text):
+        text = text.lower()
+        if self.homoglyphs:
+            text = text.translate(HOMOGLYPHS)
+        return text
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state] += (len(self.words),)
+        self.words.append(word)
+
+    def _link(self):
+        """Проставляет суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def search(self, text):
+        """Возвращает первое найденное слово словаря или None."""
+        text = self.normalize(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                word = self.words[index]
+                if self._is_whole_word(text, end - len(word), end):
+                    return word
+        return None
+
+    def _is_whole_word(self, text, start, end):
+        if not self.word_boundary:
+            return True
+        before = text[start - 1] if start else ' '
+        after = text[end] if end < len(text) else ' '
+        return not before.isalnum() and not after.isalnum()
+
+
+class ModerationDictionary:
+    """Скомпилированный словарь модерации с горячей перезагрузкой."""
+
+    SNAPSHOT_KEY = 'moderation:snapshot'
+    VERSION_KEY = 'moderation:version'
+
+    def __init__(self, base_words):
+        self.base_words = tuple(base_words)
+        self.version = None
+        self._matcher = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def matcher(self):
+        """
+        Актуальный автомат. Версия в кэше читается не чаще раза
+        в MODERATION_REFRESH_INTERVAL секунд, снимок — только при её смене.
+        База читается, лишь если снимка в кэше нет.
+        """
+        if self._matcher is None:
+            self._refresh()
+        elif (
+            time.monotonic() - self._checked_at
+            >= settings.MODERATION_REFRESH_INTERVAL
+        ):
+            self._checked_at = time.monotonic()
+            if news_cache.get(self.VERSION_KEY) != self.version:
+                self._refresh()
+        return self._matcher
+
+    def reload(self):
+        """Перестраивает автомат по базе данных и публикует его в кэше."""
+        from .models import ModerationTerm
+
+        with self._lock:
+            words = self.base_words + tuple(
+                ModerationTerm.objects.values_list('word', flat=True)
+            )
+            matcher = Matcher(
+                words,
+                word_boundary=settings.MODERATION_WORD_BOUNDARY,
+                homoglyphs=settings.MODERATION_HOMOGLYPHS,
+            )
+            self._install(time.time_ns(), matcher)
+            self.publish()
+
+    def publish(self):
+        """
+        Кладёт автомат процесса в кэш: сначала снимок, потом версию,
+        чтобы по новой версии снимок уже читался.
+        """
+        news_cache.set(self.SNAPSHOT_KEY, (self.version, self._matcher), None)
+        news_cache.set(self.VERSION_KEY, self.version, None)
+
+    def load_snapshot(self):
+        """Загружает снимок автомата из кэша, не обращаясь к базе данных."""
+        snapshot = news_cache.get(self.SNAPSHOT_KEY)
+        if snapshot is not None:
+            self._install(*snapshot)
+        return snapshot is not None
+
+    def _refresh(self):
+        if not self.load_snapshot():
+            self.reload()
+
+    def _install(self, version, matcher):
+        self.version, self._matcher = version, matcher
+        self._checked_at = time.monotonic()
@@ -0,0 +1,92 @@
+"""
+Курсорная (keyset) пагинация комментариев и постраничный вывод
+результатов поиска без подсчёта общего числа строк.
+"""
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.http import Http404
+
+from .models import Comment
+
+CURSOR_SEPARATOR = '|'
+INVALID_CURSOR = 'Некорректный курсор комментариев.'
+INVALID_PAGE = 'Некорректный номер страницы.'
+
+
+def encode_cursor(comment):
+    """Кодирует позицию комментария (created, id) в строку для URL."""
+    raw = f'{comment.created.isoformat()}{CURSOR_SEPARATOR}{comment.pk}'
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) из строки курсора."""
+    try:
+        raw = urlsafe_b64decode(cursor.encode()).decode()
+        created, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        return datetime.fromisoformat(created), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise BadRequest(INVALID_CURSOR)
+
+
+def get_comments_page(news_pk, cursor=None, page_size=None, user=None):
+    """
+    Возвращает порцию комментариев к новости и курсор следующей порции.
+
+    Комментарии упорядочены по (created, id), следующая порция начинается
+    строго после курсора, поэтому стоимость запроса не зависит от того,
+    сколько комментариев уже показано. Кроме опубликованных комментариев
+    пользователь видит свои, ожидающие модерации.
+    """
+    page_size = page_size or settings.COMMENTS_PAGE_SIZE
+    visible = Q(status=Comment.Status.PUBLISHED)
+    if user is not None and user.is_authenticated:
+        visible |= Q(author=user, status=Comment.Status.PENDING)
+    comments = Comment.objects.filter(visible, news_id=news_pk)
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    comments = list(
+        comments.select_related('author').order_by('created', 'pk')[
+            :page_size + 1
+        ]
+    )
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = encode_cursor(comments[-1])
+    return comments, next_cursor
+
+
+def page_number(value):
+    """Номер страницы из параметра запроса, по умолчанию первая."""
+    try:
+        number = int(value or 1)
+    except ValueError:
+        raise Http404(INVALID_PAGE)
+    if number < 1:
+        raise Http404(INVALID_PAGE)
+    return number
+
+
+def get_page(rows, number, page_size):
+    """
+    Возвращает строки страницы number и признак следующей страницы.
+
+    Читается на одну строку больше страницы вместо COUNT по всем
+    строкам: для поиска подсчёт — это отдельный проход по всем
+    совпадениям в индексе. Пустая страница после первой — ошибка 404,
+    как у django.core.paginator.
+    """
+    offset = (number - 1) * page_size
+    page = list(rows[offset:offset + page_size + 1])
+    if not page and number > 1:
+        raise Http404(INVALID_PAGE)
+    return page[:page_size], len(page) > page_size
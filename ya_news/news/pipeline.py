@@ -0,0 +1,169 @@
+"""
+Фоновая модерация комментариев.
+
+Когда включён COMMENT_MODERATION_QUEUE, новый комментарий сохраняется
+со статусом «на модерации», а запрос пользователя сразу завершается.
+Очередью служат сами строки Comment: каждый из локальных процессов-
+обработчиков берёт свою долю ожидающих комментариев (по остатку от
+деления id на число обработчиков), пачкой прогоняет их через проверки
+из COMMENT_MODERATION_CHECKS и публикует или скрывает.
+
+Опубликовав комментарий, обработчик сбрасывает версию фрагментов новости
+в кэше. Обработчики — отдельные процессы, поэтому очередь требует общего
+для процессов кэша; иначе веб-процессы продолжат отдавать старую
+страницу и отвечать 304 по старому ETag (проверка news.E001).
+"""
+import os
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import checks
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from yanews.cache import is_shared
+from yanews.routers import pin_to_primary
+
+from .cache import bump_version
+from .counters import change_comment_count
+from .forms import bad_words
+from .models import Comment
+from .search import index_comments
+
+LINK = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+
+def check_moderation_queue(app_configs, **kwargs):
+    """Очередь модерации не включается без общего для процессов кэша."""
+    if not settings.COMMENT_MODERATION_QUEUE or is_shared():
+        return []
+    return [checks.Error(
+        'Очередь модерации включена, а кэш виден только своему процессу.',
+        hint=(
+            'Обработчики moderate_comments публикуют комментарии в своих '
+            'процессах, и веб-процессы не узнают о новых версиях страниц. '
+            'Задайте CACHE_BACKEND=file или memcached.'
+        ),
+        id='news.E001',
+    )]
+
+
+def check_bad_words(comments):
+    """Словарь мог измениться после отправки комментария."""
+    matcher = bad_words.matcher()
+    return {
+        comment.pk for comment in comments if matcher.search(comment.text)
+    }
+
+
+def check_links(comments):
+    """Слишком много ссылок — признак спама."""
+    return {
+        comment.pk for comment in comments
+        if len(LINK.findall(comment.text)) > settings.COMMENT_MAX_LINKS
+    }
+
+
+def check_duplicates(comments):
+    """
+    Повтор уже опубликованного автором текста за последние сутки.
+
+    Проверяется одним запросом на всю пачку.
+    """
+    published = set(Comment.objects.filter(
+        author_id__in={comment.author_id for comment in comments},
+        text__in={comment.text for comment in comments},
+        status=Comment.Status.PUBLISHED,
+        created__gte=timezone.now() - timedelta(days=1),
+    ).values_list('author_id', 'text'))
+    return {
+        comment.pk for comment in comments
+        if (comment.author_id, comment.text) in published
+    }
+
+
+def moderate_batch(comments):
+    """
+    Прогоняет пачку комментариев через проверки и сохраняет решение.
+
+    Счётчик каждой новости растёт на число комментариев, которые
+    действительно сменили статус на «опубликован», и они же попадают
+    в поисковый индекс.
+    Возвращает число опубликованных и скрытых комментариев.
+    """
+    hidden = set()
+    for path in settings.COMMENT_MODERATION_CHECKS:
+        hidden |= import_string(path)(comments)
+    published = defaultdict(list)
+    for comment in comments:
+        if comment.pk not in hidden:
+            published[comment.news_id].append(comment)
+    with transaction.atomic():
+        Comment.objects.filter(
+            pk__in=hidden, status=Comment.Status.PENDING
+        ).update(status=Comment.Status.HIDDEN)
+        for news_pk, news_comments in published.items():
+            changed = Comment.objects.filter(
+                pk__in=[comment.pk for comment in news_comments],
+                status=Comment.Status.PENDING,
+            ).update(status=Comment.Status.PUBLISHED)
+            if changed:
+                change_comment_count(news_pk, changed)
+            if changed == len(news_comments):
+                index_comments(news_comments)
+            elif changed:
+                # Часть комментариев успели изменить или удалить.
+                index_comments(Comment.objects.filter(
+                    pk__in=[comment.pk for comment in news_comments],
+                    status=Comment.Status.PUBLISHED,
+                ))
+        for news_pk in {comment.news_id for comment in comments}:
+            transaction.on_commit(
+                lambda news_pk=news_pk: bump_version(news_pk)
+            )
+    return len(comments) - len(hidden), len(hidden)
+
+
+def pending_batch(worker, workers, batch_size):
+    """Очередная пачка ожидающих комментариев для обработчика worker."""
+    return list(
+        Comment.objects.filter(status=Comment.Status.PENDING)
+        .alias(shard=Mod(F('pk'), workers))
+        .filter(shard=worker)
+        .only('pk', 'news_id', 'author_id', 'text')
+        .order_by('pk')[:batch_size]
+    )
+
+
+def run_worker(worker=0, workers=1, batch_size=100, once=False):
+    """
+    Обрабатывает очередь, пока она не опустеет (once) или бесконечно.
+
+    Возвращает общее число обработанных комментариев.
+    """
+    processed = 0
+    # Реплика может ещё отдавать уже обработанные комментарии.
+    with pin_to_primary():
+        while True:
+            batch = pending_batch(worker, workers, batch_size)
+            if not batch:
+                if once:
+                    return processed
+                time.sleep(settings.COMMENT_MODERATION_POLL_INTERVAL)
+                continue
+            processed += sum(moderate_batch(batch))
+
+
+def worker_process(settings_module, *args, **kwargs):
+    """Точка входа дочернего процесса: настраивает Django и ждёт очередь."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+    run_worker(*args, **kwargs)
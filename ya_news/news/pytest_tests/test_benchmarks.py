@@ -0,0 +1,137 @@
+import random
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.urls import reverse
+
+import pytest
+
+from conftest import BENCHMARK_COMMENTS_PER_NEWS
+from news.factories import make_comments
+from news.models import Comment
+from news.moderation import Matcher
+from news.pipeline import run_worker
+from news.search import rebuild_index, search
+from yanews.benchmarks import logger
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+HOME_PAGE_REPEATS = 20
+MODERATION_WORDS_COUNT = 5000
+MODERATION_TEXT_LENGTH = 5000
+CYRILLIC = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+MODERATION_QUEUE_SIZE = 20_000
+MODERATION_BATCH_SIZE = 500
+SEARCH_DOCUMENTS_COUNT = 1_000_000
+SEARCH_VOCABULARY_SIZE = 20_000
+SEARCH_WORDS_PER_DOCUMENT = 5
+SEARCH_REPEATS = 10
+
+
+def test_homepage_cost_does_not_depend_on_comment_count(
+    client, django_assert_num_queries, news_with_many_comments
+):
+    """
+    Главная страница с 10 новостями по 50 000 комментариев отдаётся двумя
+    запросами к базе (версия списка для ETag и сама страница),
+    комментарии в память не загружаются.
+    """
+    url = reverse('news:home')
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    for test_news in response.context['object_list']:
+        assert test_news.comment_count == BENCHMARK_COMMENTS_PER_NEWS
+        assert not hasattr(test_news, '_prefetched_objects_cache')
+    started = time.perf_counter()
+    for _ in range(HOME_PAGE_REPEATS):
+        client.get(url)
+    elapsed = (time.perf_counter() - started) / HOME_PAGE_REPEATS
+    logger.info(f'Главная страница: {elapsed * 1000:.1f} мс на запрос')
+
+
+def test_bad_words_matcher_is_faster_than_loop():
+    """Проверка текста автоматом быстрее цикла по словарю из тысяч слов."""
+    rng = random.Random(0)
+    words = [
+        ''.join(rng.choices(CYRILLIC, k=rng.randint(5, 12)))
+        for _ in range(MODERATION_WORDS_COUNT)
+    ]
+    text = ' '.join(
+        ''.join(rng.choices(CYRILLIC, k=rng.randint(2, 9)))
+        for _ in range(MODERATION_TEXT_LENGTH // 6)
+    )
+    matcher = Matcher(words)
+
+    started = time.perf_counter()
+    loop_result = next((word for word in words if word in text.lower()), None)
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matcher_result = matcher.search(text)
+    matcher_time = time.perf_counter() - started
+
+    assert (loop_result is None) == (matcher_result is None)
+    logger.info(
+        f'Цикл: {loop_time * 1000:.1f} мс, '
+        f'автомат: {matcher_time * 1000:.1f} мс'
+    )
+    assert matcher_time < loop_time
+
+
+def test_moderation_pipeline_throughput(author, news):
+    """Пропускная способность обработчика очереди модерации."""
+    make_comments(
+        [news], [author], MODERATION_QUEUE_SIZE,
+        status=Comment.Status.PENDING,
+    )
+    started = time.perf_counter()
+    processed = run_worker(batch_size=MODERATION_BATCH_SIZE, once=True)
+    elapsed = time.perf_counter() - started
+    assert processed == MODERATION_QUEUE_SIZE
+    logger.info(f'Модерация: {processed / elapsed:.0f} комментариев/с')
+
+
+def test_search_latency(client, author, news):
+    """
+    Время поиска и страницы результатов по индексу из миллиона
+    документов.
+    """
+    rng = random.Random(0)
+    vocabulary = [
+        ''.join(rng.choices(CYRILLIC, k=rng.randint(5, 10)))
+        for _ in range(SEARCH_VOCABULARY_SIZE)
+    ]
+    # Частоты слов убывают по закону Ципфа, как в живом тексте.
+    frequencies = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    make_comments(
+        [news], [author], SEARCH_DOCUMENTS_COUNT - 1,
+        text=lambda index: ' '.join(rng.choices(
+            vocabulary, frequencies, k=SEARCH_WORDS_PER_DOCUMENT
+        )),
+    )
+    started = time.perf_counter()
+    assert rebuild_index(batch_size=10_000) == SEARCH_DOCUMENTS_COUNT
+    logger.info(f'Построение индекса: {time.perf_counter() - started:.0f} с')
+    url = reverse('news:search')
+    for query in (
+        vocabulary[-1],
+        vocabulary[100],
+        vocabulary[0],
+        f'{vocabulary[0]} {vocabulary[100]}',
+    ):
+        started = time.perf_counter()
+        for _ in range(SEARCH_REPEATS):
+            page = list(search(query)[:settings.SEARCH_PAGE_SIZE])
+        elapsed = (time.perf_counter() - started) / SEARCH_REPEATS
+        assert page
+        started = time.perf_counter()
+        for _ in range(SEARCH_REPEATS):
+            response = client.get(url, {'q': query, 'page': 2})
+        page_elapsed = (time.perf_counter() - started) / SEARCH_REPEATS
+        assert response.status_code == HTTPStatus.OK
+        assert response.context['results']
+        logger.info(
+            f'Поиск «{query}»: {elapsed * 1000:.1f} мс, '
+            f'вторая страница: {page_elapsed * 1000:.1f} мс'
+        )
@@ -0,0 +1,109 @@
+import threading
+import time
+from http import HTTPStatus
+
+from django.core.cache.backends.base import InvalidCacheKey
+from django.urls import reverse
+
+import pytest
+
+from yanews.cache import (
+    NamespacedCache, check_shared_cache, get_stats, stats,
+)
+
+
+@pytest.fixture(params=('locmem', 'file', 'memcached-standin'))
+def cache_backend(request, settings, tmp_path):
+    """Кэш проекта на каждом из поддерживаемых бэкендов"""
+    backend = dict(settings.CACHE_BACKENDS[request.param])
+    if request.param == 'file':
+        backend['LOCATION'] = tmp_path
+    settings.CACHES = {'default': backend}
+    stats.reset()
+    return NamespacedCache('news')
+
+
+def test_namespace_version_invalidates_keys(cache_backend, settings):
+    """Увеличение версии пространства имён сбрасывает его ключи."""
+    cache_backend.set('key', 'value')
+    assert cache_backend.get('key') == 'value'
+    settings.CACHE_NAMESPACES = {'news': {'version': 2}}
+    assert cache_backend.get('key') is None
+    assert NamespacedCache('other').get('key') is None
+    assert get_stats()['news'] == {'sets': 1, 'hits': 1, 'misses': 1}
+
+
+def test_get_or_compute_is_single_flight(cache_backend):
+    """Одновременные промахи по одному ключу вычисляют значение один раз."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'fragment'
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                cache_backend.get_or_compute('fragment', compute)
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['fragment'] * 8
+    assert len(calls) == 1
+
+
+def test_evictions_are_counted(settings):
+    """Вытеснение записей при переполнении попадает в счётчики."""
+    settings.CACHES = {'default': {
+        **settings.CACHE_BACKENDS['locmem'],
+        'LOCATION': 'evictions',
+        'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2},
+    }}
+    stats.reset()
+    cache = NamespacedCache('news')
+    for index in range(5):
+        cache.set(index, index)
+    assert get_stats()['backend:evictions']['evictions'] > 0
+
+
+def test_memcached_standin_rejects_invalid_keys(settings):
+    """Заглушка memcached отклоняет ключи, недопустимые для memcached."""
+    settings.CACHES = {'default': settings.CACHE_BACKENDS['memcached-standin']}
+    with pytest.raises(InvalidCacheKey):
+        NamespacedCache('news').set('ключ с пробелами', 'value')
+
+
+@pytest.mark.parametrize(
+    'parametrized_client, expected_status',
+    (
+        (pytest.lazy_fixture('client'), HTTPStatus.FOUND),  # type: ignore
+        (pytest.lazy_fixture('admin_client'), HTTPStatus.OK),  # type: ignore
+    ),
+)
+def test_cache_stats_available_to_staff(parametrized_client, expected_status):
+    """Счётчики кэша доступны только сотрудникам."""
+    response = parametrized_client.get(reverse('cache-stats'))
+    assert response.status_code == expected_status
+
+
+@pytest.mark.parametrize(
+    'backend, warnings',
+    (('locmem', ['yanews.W001']), ('memcached-standin', ['yanews.W001']),
+     ('file', [])),
+)
+def test_process_local_cache_is_reported(settings, tmp_path, backend,
+                                         warnings):
+    """Проверка системы предупреждает о кэше в памяти одного процесса."""
+    settings.CACHES = {
+        'default': {**settings.CACHE_BACKENDS[backend], 'LOCATION': tmp_path}
+    }
+    assert [
+        message.id for message in check_shared_cache(None)
+    ] == warnings
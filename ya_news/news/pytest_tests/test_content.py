@@ -1,8 +1,13 @@
 from django.conf import settings
+from django.test import Client
 from django.urls import reverse
 
 import pytest
 
+from news.counters import recount_comments
+from news.models import Comment
+from conftest import NEW_TEXT, TEXT_COMMENT
+
 
 @pytest.mark.django_db
 def test_max_10_news_on_homepage(client, list_news):
@@ -58,3 +63,126 @@ def test_comment_form_accessibility(parametrized_client, status, comment):
     url = reverse('news:detail', kwargs={'pk': comment.pk})
     response = parametrized_client.get(url)
     assert ('form' in response.context) is status
+
+
+@pytest.mark.parametrize('comments_count', (1, 100))
+@pytest.mark.django_db
+def test_comment_count_is_aggregated_on_homepage(
+    client, django_assert_num_queries, list_news, author, comments_count
+):
+    """
+    Количество комментариев на главной странице хранится в новости
+    и выводится без обращения к таблице комментариев: один запрос
+    на версию страницы для ETag и один на сами новости.
+    """
+    Comment.objects.bulk_create(
+        Comment(author=author, news=list_news[0], text=TEXT_COMMENT)
+        for _ in range(comments_count)
+    )
+    recount_comments()
+    url = reverse('news:home')
+    with django_assert_num_queries(2) as context:
+        response = client.get(url)
+    for query in context.captured_queries:
+        assert '"news_comment"' not in query['sql']
+    first_news = response.context['object_list'][0]
+    assert first_news.comment_count == comments_count
+    assert f'Комментариев: {comments_count}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated_by_cursor(
+    client, news, list_comments, settings
+):
+    """
+    На странице новости выводится только первая порция комментариев,
+    следующая порция отдаётся по курсору без повторов.
+    """
+    settings.COMMENTS_PAGE_SIZE = 1
+    response = client.get(reverse('news:detail', kwargs={'pk': news.pk}))
+    assert response.context['comments'] == list_comments[:1]
+    next_cursor = response.context['next_cursor']
+    assert next_cursor
+    response = client.get(
+        reverse('news:comments', kwargs={'pk': news.pk}),
+        {'after': next_cursor},
+    )
+    assert response.context['comments'] == list_comments[1:]
+    assert response.context['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_detail_page_query_count_does_not_depend_on_comments(
+    client, django_assert_num_queries, news, author, settings
+):
+    """Страница новости читает комментарии одним запросом с LIMIT."""
+    settings.COMMENTS_PAGE_SIZE = 5
+    Comment.objects.bulk_create(
+        Comment(author=author, news=news, text=TEXT_COMMENT)
+        for _ in range(50)
+    )
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    with django_assert_num_queries(2):
+        response = client.get(url)
+    assert len(response.context['comments']) == settings.COMMENTS_PAGE_SIZE
+
+
+@pytest.mark.django_db
+def test_anonymous_detail_page_is_served_from_cache(
+    client, django_assert_num_queries, comment
+):
+    """Повторный запрос анонима к странице новости не обращается к БД."""
+    url = reverse('news:detail', kwargs={'pk': comment.news.pk})
+    first_response = client.get(url)
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.content == first_response.content
+    assert comment.text in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_owner_links_are_rendered_outside_cache(author_client, comment):
+    """
+    Ссылки на редактирование и удаление комментария видит только автор,
+    даже если страница уже закэширована для анонимов.
+    """
+    client = Client()
+    url = reverse('news:detail', kwargs={'pk': comment.news.pk})
+    edit_url = reverse('news:edit', kwargs={'pk': comment.pk})
+    assert edit_url not in client.get(url).content.decode()
+    assert edit_url in author_client.get(url).content.decode()
+    assert edit_url not in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_detail_cache_is_invalidated_by_comment_writes(
+    admin_client, author_client, news, comment,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Добавление комментария и его редактирование в админке
+    обновляют закэшированную страницу новости.
+    """
+    client = Client()
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, data={'text': NEW_TEXT})
+    assert NEW_TEXT in client.get(url).content.decode()
+    admin_url = reverse('admin:news_news_change', args=(news.pk,))
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_client.post(admin_url, data={
+            'title': news.title,
+            'text': news.text,
+            'date': news.date.strftime('%d.%m.%Y'),
+            'comment_set-TOTAL_FORMS': 1,
+            'comment_set-INITIAL_FORMS': 1,
+            'comment_set-MIN_NUM_FORMS': 0,
+            'comment_set-MAX_NUM_FORMS': 1000,
+            'comment_set-0-id': comment.pk,
+            'comment_set-0-news': news.pk,
+            'comment_set-0-author': comment.author.pk,
+            'comment_set-0-text': 'Исправлено модератором',
+            'comment_set-0-status': comment.status,
+        })
+    assert 'Исправлено модератором' in client.get(url).content.decode()
@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from news.factories import make_comments, make_news
+from news.models import Comment, News
+from yanews.benchmarks import logger
+from yanews.factories import START, make_users
+
+SEED_ROWS = 100_000
+SPEEDUP = 3
+
+
+@pytest.mark.django_db
+def test_factories_build_graph_in_few_queries():
+    """
+    Новости, авторы и комментарии создаются пачкой несколькими
+    запросами, с заданными датами и согласованными счётчиками.
+    """
+    with CaptureQueriesContext(connection) as context:
+        news = list(make_news(3))
+        authors = list(make_users(2))
+        comments = list(make_comments(news, authors, 4))
+    assert len(context.captured_queries) <= 10
+    assert [item.date for item in news] == [
+        (START - timedelta(days=index)).date() for index in range(3)
+    ]
+    assert len(comments) == 12
+    first, second, *_ = news[0].comment_set.all()
+    assert first.created == START
+    assert second.created == START + timedelta(minutes=1)
+    assert {comment.author for comment in comments} == set(authors)
+    assert [item.comment_count for item in News.objects.all()] == [4] * 3
+
+
+@pytest.mark.django_db
+def test_factories_continue_after_existing_rows(news, author):
+    """Ключи новых строк продолжают уже существующие."""
+    comments = make_comments(
+        make_news(2), [author], 1, status=Comment.Status.PENDING
+    )
+    assert News.objects.count() == 3
+    assert comments.count() == 2
+    assert News.objects.get(pk=news.pk).comment_count == 0
+    assert set(
+        News.objects.values_list('comment_count', flat=True)
+    ) == {0}
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_seeding_speed(author):
+    """
+    Фабрики наполняют базу в разы быстрее bulk_create, на SEED_ROWS
+    строк уходят доли секунды.
+    """
+    started = time.perf_counter()
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст', date=START.date())
+        for index in range(SEED_ROWS)
+    )
+    bulk_create_time = time.perf_counter() - started
+    timings = {}
+    for name, seed in (
+        ('новостей', lambda: make_news(SEED_ROWS)),
+        ('комментариев', lambda: make_comments(
+            News.objects.all()[:10], [author], SEED_ROWS // 10
+        )),
+    ):
+        started = time.perf_counter()
+        seed()
+        timings[name] = time.perf_counter() - started
+    logger.info(
+        f'{SEED_ROWS} строк: bulk_create {bulk_create_time * 1000:.0f} мс, '
+        + ', '.join(
+            f'{name} {elapsed * 1000:.0f} мс'
+            for name, elapsed in timings.items()
+        )
+    )
+    assert timings['новостей'] * SPEEDUP < bulk_create_time
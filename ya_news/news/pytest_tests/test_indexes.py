@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from conftest import BENCHMARK_NEWS_COUNT
+from news.factories import make_comments, make_news
+from news.models import Comment
+from yanews.factories import make_users
+
+SEED_AUTHORS_COUNT = 100
+FULL_SCAN = 'SCAN news_comment'
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@pytest.fixture(params=(
+    1000,
+    pytest.param(1_000_000, marks=pytest.mark.benchmark),
+))
+def seeded_comments(request):
+    """
+    База с заданным числом комментариев, распределённых по новостям
+    и авторам. После заполнения собирается статистика (ANALYZE), чтобы
+    планировщик выбирал индексы так же, как на рабочей базе.
+    """
+    news = list(make_news(BENCHMARK_NEWS_COUNT))
+    authors = list(make_users(SEED_AUTHORS_COUNT))
+    make_comments(news, authors, request.param // BENCHMARK_NEWS_COUNT)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return [item.pk for item in news]
+
+
+def query_plan(sql, params=()):
+    """План выполнения запроса одной строкой."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return '\n'.join(row[-1] for row in cursor.fetchall())
+
+
+def view_query_plans(client, url):
+    """Планы запросов к новостям и комментариям, выполненных страницей."""
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [
+        query_plan(query['sql']) for query in context.captured_queries
+        if '"news_news"' in query['sql'] or '"news_comment"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+def test_home_page_uses_indexes(client, seeded_comments):
+    """
+    Главная страница читает свежие новости по индексу (date, id)
+    и не обращается к комментариям.
+    """
+    for plan in view_query_plans(client, reverse('news:home')):
+        assert 'news_date_id_idx' in plan
+        assert 'news_comment' not in plan
+        assert TEMP_SORT not in plan
+
+
+@pytest.mark.django_db
+def test_detail_page_uses_indexes(client, seeded_comments):
+    """
+    Комментарии новости читаются по индексу (news, created, id)
+    уже в нужном порядке, без сортировки во временной таблице.
+    """
+    url = reverse('news:detail', args=(seeded_comments[0],))
+    *_, plan = view_query_plans(client, url)
+    assert 'comment_news_created_idx' in plan
+    assert FULL_SCAN not in plan
+    assert TEMP_SORT not in plan
+
+
+@pytest.mark.django_db
+def test_author_comments_use_index(seeded_comments, django_user_model):
+    """Комментарии автора выбираются по индексу (author, created)."""
+    author = django_user_model.objects.first()
+    sql, params = (
+        Comment.objects.filter(author=author).order_by('created')
+        .query.sql_with_params()
+    )
+    plan = query_plan(sql, params)
+    assert 'comment_author_created_idx' in plan
+    assert TEMP_SORT not in plan
@@ -1,14 +1,36 @@
+import threading
 from http import HTTPStatus
+from io import StringIO
 
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
 from django.urls import reverse
 
 import pytest
 
 from pytest_django.asserts import assertRedirects, assertFormError
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
-from conftest import TEXT_COMMENT
+from news import pipeline
+from news.factories import make_comments
+from news.forms import BAD_WORDS, WARNING, CommentForm, bad_words
+from news.models import Comment, ModerationTerm, News
+from news.moderation import ModerationDictionary
+from news.pipeline import check_moderation_queue, run_worker
+from conftest import (
+    MODERATION_TERM, NEW_TEXT, SESSION_QUERIES, TEXT_COMMENT,
+)
+
+# Сессия, если она не в кэше, пользователь после входа, чтение объекта
+# и одна запись.
+WRITE_QUERIES_BUDGET = SESSION_QUERIES + 3
+# Создание и удаление комментария ещё сдвигают счётчик новости.
+COUNTER_QUERIES = 1
+# Добавление в поисковый индекс или удаление из него; при
+# редактировании нужно и то, и другое.
+INDEX_QUERIES = 1
+MODERATION_WORKERS = 3
+QUEUE_SIZE = 30
 
 
 @pytest.mark.django_db
@@ -46,6 +68,179 @@ def test_comment_with_banned_words_fails(author_client, news):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.django_db
+def test_moderation_term_applies_without_restart(
+    moderation_term, django_assert_num_queries
+):
+    """
+    Слово, добавленное в словарь модерации через базу данных, запрещается
+    без перезапуска, а дальнейшие проверки не обращаются к базе.
+    """
+    data = {'text': f'Ты {MODERATION_TERM.upper()}!'}
+    assert not CommentForm(data=data).is_valid()
+    with django_assert_num_queries(0):
+        assert not CommentForm(data=data).is_valid()
+
+
+@pytest.mark.django_db
+def test_moderation_term_reaches_other_processes(
+    settings, django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    """
+    Другой процесс замечает новое слово по версии в общем кэше не позже,
+    чем через MODERATION_REFRESH_INTERVAL секунд, и загружает снимок
+    без запросов к БД.
+    """
+    other_process = ModerationDictionary(BAD_WORDS)
+    assert not other_process.matcher().search(MODERATION_TERM)
+    with django_capture_on_commit_callbacks(execute=True):
+        ModerationTerm.objects.create(word=MODERATION_TERM)
+    assert not other_process.matcher().search(MODERATION_TERM)
+    settings.MODERATION_REFRESH_INTERVAL = 0
+    with django_assert_num_queries(0):
+        assert other_process.matcher().search(MODERATION_TERM)
+
+
+@pytest.mark.django_db
+def test_moderation_snapshot_loads_without_database(
+    moderation_term, django_assert_num_queries
+):
+    """Новый процесс загружает готовый автомат из снимка без запросов к БД."""
+    bad_words.reload()
+    dictionary = ModerationDictionary(BAD_WORDS)
+    with django_assert_num_queries(0):
+        assert dictionary.load_snapshot()
+        assert dictionary.matcher().search(MODERATION_TERM)
+
+
+@pytest.mark.parametrize(
+    'backend, errors', (('locmem', ['news.E001']), ('file', []))
+)
+def test_moderation_queue_requires_shared_cache(
+    settings, tmp_path, backend, errors
+):
+    """Очередь модерации не включается с кэшем в памяти одного процесса."""
+    settings.COMMENT_MODERATION_QUEUE = True
+    settings.CACHES = {
+        'default': {**settings.CACHE_BACKENDS[backend], 'LOCATION': tmp_path}
+    }
+    assert [
+        message.id for message in check_moderation_queue(None)
+    ] == errors
+    settings.COMMENT_MODERATION_QUEUE = False
+    assert check_moderation_queue(None) == []
+
+
+@pytest.mark.django_db
+def test_comment_is_published_by_moderation_worker(
+    author_client, news, new_comment_text, settings,
+    django_capture_on_commit_callbacks,
+):
+    """
+    При включённой очереди модерации комментарий сразу сохраняется,
+    но виден остальным только после проверки обработчиком.
+    """
+    settings.COMMENT_MODERATION_QUEUE = True
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    author_client.post(url, data=new_comment_text)
+    comment = Comment.objects.get()
+    assert comment.status == Comment.Status.PENDING
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert NEW_TEXT in author_client.get(url).content.decode()
+    anonymous_client = Client()
+    assert NEW_TEXT not in anonymous_client.get(url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert run_worker(once=True) == 1
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PUBLISHED
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert NEW_TEXT in anonymous_client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_moderation_worker_hides_spam(author, news, comment):
+    """Комментарии со множеством ссылок и повторы текста скрываются."""
+    Comment.objects.bulk_create(
+        Comment(
+            news=news, author=author, text=text,
+            status=Comment.Status.PENDING,
+        )
+        for text in (
+            'http://a.ru http://b.ru http://c.ru',
+            comment.text,
+            NEW_TEXT,
+        )
+    )
+    run_worker(once=True)
+    statuses = Comment.objects.exclude(pk=comment.pk).values_list(
+        'text', 'status'
+    )
+    assert sorted(statuses) == sorted((
+        ('http://a.ru http://b.ru http://c.ru', Comment.Status.HIDDEN),
+        (comment.text, Comment.Status.HIDDEN),
+        (NEW_TEXT, Comment.Status.PUBLISHED),
+    ))
+    news.refresh_from_db()
+    assert news.comment_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers_moderate_each_comment_once(author, news, monkeypatch):
+    """
+    Несколько обработчиков одной очереди делят её по остатку от номера
+    комментария: каждый комментарий проверяет ровно один из них
+    и ровно один раз. Обработчики работают в потоках, их обращения
+    к базе чередуются; каждое выполняется под общей блокировкой, потому
+    что тестовая база SQLite в памяти не ждёт занятых таблиц.
+    """
+    make_comments(
+        [news], [author], QUEUE_SIZE, status=Comment.Status.PENDING
+    )
+    moderated = {worker: [] for worker in range(MODERATION_WORKERS)}
+    pending_batch = pipeline.pending_batch
+    moderate_batch = pipeline.moderate_batch
+    database = threading.Lock()
+
+    def select(*args):
+        with database:
+            return pending_batch(*args)
+
+    def record(comments):
+        worker = int(threading.current_thread().name)
+        moderated[worker].extend(comment.pk for comment in comments)
+        with database:
+            return moderate_batch(comments)
+
+    def run(worker):
+        try:
+            pipeline.run_worker(
+                worker, MODERATION_WORKERS, batch_size=4, once=True
+            )
+        finally:
+            connection.close()
+
+    monkeypatch.setattr(pipeline, 'pending_batch', select)
+    monkeypatch.setattr(pipeline, 'moderate_batch', record)
+    threads = [
+        threading.Thread(target=run, args=(worker,), name=str(worker))
+        for worker in range(MODERATION_WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pks = sorted(pk for worker_pks in moderated.values() for pk in worker_pks)
+    assert pks == sorted(Comment.objects.values_list('pk', flat=True))
+    for worker, worker_pks in moderated.items():
+        assert worker_pks
+        assert all(pk % MODERATION_WORKERS == worker for pk in worker_pks)
+    assert not Comment.objects.filter(status=Comment.Status.PENDING).exists()
+    news.refresh_from_db()
+    assert news.comment_count == QUEUE_SIZE
+
+
 @pytest.mark.django_db
 def test_author_user_edit_comment(author_client, news, comment,
                                   new_comment_text):
@@ -79,6 +274,56 @@ def test_author_user_delete_comment(author_client, news, comment):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.django_db
+def test_comment_count_follows_comment_writes(
+    author_client, news, new_comment_text
+):
+    """Добавление и удаление комментария меняют счётчик новости."""
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    author_client.post(url, data=new_comment_text)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get()
+    author_client.post(reverse('news:delete', kwargs={'pk': comment.pk}))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_admin_inline_status_change_updates_comment_count(
+    admin_client, news, comment
+):
+    """Скрытие комментария в админке уменьшает счётчик новости."""
+    admin_url = reverse('admin:news_news_change', args=(news.pk,))
+    admin_client.post(admin_url, data={
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 1,
+        'comment_set-INITIAL_FORMS': 1,
+        'comment_set-MIN_NUM_FORMS': 0,
+        'comment_set-MAX_NUM_FORMS': 1000,
+        'comment_set-0-id': comment.pk,
+        'comment_set-0-news': news.pk,
+        'comment_set-0-author': comment.author.pk,
+        'comment_set-0-text': comment.text,
+        'comment_set-0-status': Comment.Status.HIDDEN,
+    })
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_recount_comments_repairs_drift(news, comment):
+    """Команда recount_comments исправляет разошедшиеся счётчики."""
+    News.objects.update(comment_count=42)
+    out = StringIO()
+    call_command('recount_comments', stdout=out)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert 'Исправлено счётчиков: 1' in out.getvalue()
+
+
 @pytest.mark.django_db
 def test_author_user_cannot_delete_comment(admin_client, comment):
     """Авторизованный пользователь не может удалять чужие комментарии."""
@@ -86,3 +331,41 @@ def test_author_user_cannot_delete_comment(admin_client, comment):
     response = admin_client.delete(comment_url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'name, data, queries',
+    (
+        (
+            'news:detail',
+            {'text': TEXT_COMMENT},
+            WRITE_QUERIES_BUDGET + COUNTER_QUERIES + INDEX_QUERIES,
+        ),
+        (
+            'news:edit',
+            {'text': TEXT_COMMENT},
+            WRITE_QUERIES_BUDGET + 2 * INDEX_QUERIES,
+        ),
+        (
+            'news:delete',
+            {},
+            WRITE_QUERIES_BUDGET + COUNTER_QUERIES + INDEX_QUERIES,
+        ),
+    ),
+)
+def test_comment_writes_query_budget(
+    author_client, comment, django_assert_num_queries, settings, name, data,
+    queries,
+):
+    """
+    Создание, редактирование и удаление комментария укладываются
+    в фиксированное число запросов к базе данных, даже когда пора
+    сверять версию словаря модерации: она читается из кэша.
+    """
+    settings.MODERATION_REFRESH_INTERVAL = 0
+    pk = comment.news.pk if name == 'news:detail' else comment.pk
+    url = reverse(name, kwargs={'pk': pk})
+    with django_assert_num_queries(queries):
+        response = author_client.post(url, data=data)
+    assert response.status_code == HTTPStatus.FOUND
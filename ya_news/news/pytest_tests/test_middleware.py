@@ -0,0 +1,43 @@
+import json
+
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+import pytest
+
+from news.models import News
+from yanews.middleware import QueryBudgetMiddleware, QueryBudgetWarning
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client, news):
+    """В ответе есть заголовок Server-Timing с числом запросов к БД."""
+    response = client.get(reverse('news:home'))
+    server_timing = response['Server-Timing']
+    assert 'desc="2 queries"' in server_timing
+    assert 'tpl;dur=' in server_timing
+
+
+@pytest.mark.django_db
+def test_query_budget_overrun_fails(client, news, settings):
+    """Превышение бюджета запросов для маршрута приводит к ошибке в тестах."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetWarning):
+        client.get(reverse('news:home'))
+
+
+@pytest.mark.django_db
+def test_duplicate_queries_are_logged(news, caplog):
+    """Повторяющиеся запросы (N+1) попадают в структурированный журнал."""
+    def n_plus_one_view(request):
+        for _ in range(3):
+            News.objects.get(pk=news.pk)
+        return HttpResponse()
+
+    middleware = QueryBudgetMiddleware(n_plus_one_view)
+    with caplog.at_level('INFO', logger='yanews.middleware'):
+        middleware(RequestFactory().get('/'))
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['queries'] == 3
+    assert record['duplicates'] == 1
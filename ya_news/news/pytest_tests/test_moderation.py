@@ -0,0 +1,39 @@
+import pytest
+
+from news.moderation import Matcher
+
+WORDS = ('редиска', 'негодяй', 'he', 'she', 'hers')
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('Ты настоящая РЕДИСКА!', 'редиска'),
+        ('ushers', 'she'),
+        ('Вежливый комментарий', None),
+        ('', None),
+    ),
+)
+def test_matcher_finds_any_word(text, expected):
+    """Автомат находит любое слово словаря, в том числе внутри других."""
+    assert Matcher(WORDS).search(text) == expected
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('редиска', 'редиска'),
+        ('редиски, редиска.', 'редиска'),
+        ('редисками', None),
+    ),
+)
+def test_matcher_word_boundary(text, expected):
+    """С word_boundary засчитываются только целые слова."""
+    assert Matcher(WORDS, word_boundary=True).search(text) == expected
+
+
+def test_matcher_homoglyphs():
+    """Латинские двойники кириллических букв не обходят фильтр."""
+    text = 'ты peдиcкa'
+    assert Matcher(WORDS).search(text) is None
+    assert Matcher(WORDS, homoglyphs=True).search(text) == 'редиска'
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+from django.contrib.sessions.models import Session
+from django.urls import reverse
+
+import pytest
+
+from news.models import Comment, News
+from news.pipeline import run_worker
+from yanews.routers import PIN_COOKIE
+
+pytestmark = pytest.mark.django_db(databases=('default', 'replica'))
+
+
+def replicate(*models):
+    """Копирует строки моделей из основной базы в реплику."""
+    for model in models:
+        model.objects.using('replica').all().delete()
+        model.objects.using('replica').bulk_create(
+            model.objects.using('default').all()
+        )
+
+
+@pytest.fixture
+def replica(settings, author_client, news, django_user_model):
+    """Чтение идёт с реплики, в которую скопированы новость и сессия."""
+    settings.DATABASE_REPLICAS = ['replica']
+    replicate(django_user_model, Session, News)
+
+
+def test_reads_go_to_replica(replica, author_client, news, author):
+    """Без изменяющего запроса страница читает отстающую реплику."""
+    Comment.objects.create(news=news, author=author, text='Текст')
+    url = reverse('news:comments', args=(news.pk,))
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.context['comments'] == []
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_user_reads_own_comment_after_post(
+        replica, author_client, news, django_capture_on_commit_callbacks
+):
+    """
+    После отправки комментария пользователь читает основную базу
+    и видит свой комментарий, пока не истечёт cookie закрепления.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.post(
+            reverse('news:detail', args=(news.pk,)), {'text': 'Текст'}
+        )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.cookies[PIN_COOKIE]['max-age'] > 0
+    url = reverse('news:comments', args=(news.pk,))
+    response = author_client.get(url)
+    assert [comment.text for comment in response.context['comments']] == [
+        'Текст'
+    ]
+    del author_client.cookies[PIN_COOKIE]
+    assert author_client.get(url).context['comments'] == []
+
+
+def test_fresh_fragments_are_rendered_from_primary(
+    replica, client, news, author, settings,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Анонимная страница сразу после изменения собирается из основной базы
+    и не кладёт в кэш устаревшие фрагменты с реплики; позже страница
+    читает реплику.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Свежий')
+    url = reverse('news:detail', args=(news.pk,))
+    response = client.get(url)
+    assert 'Свежий' in response.content.decode()
+    settings.REPLICA_PIN_SECONDS = 0
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Второй')
+    assert 'Второй' not in client.get(url).content.decode()
+
+
+def test_moderation_worker_reads_primary(replica, news, author):
+    """Обработчик очереди модерации не читает отстающую реплику."""
+    Comment.objects.create(
+        news=news, author=author, text='Текст', status=Comment.Status.PENDING
+    )
+    assert run_worker(once=True) == 1
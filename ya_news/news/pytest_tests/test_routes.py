@@ -1,11 +1,15 @@
 from http import HTTPStatus
 
+from django.test import Client
 from django.urls import reverse
 
 import pytest
 
 from pytest_django.asserts import assertRedirects
 
+from news.models import Comment
+from conftest import NEW_TEXT
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize(
@@ -30,6 +34,69 @@ def test_news_page_access_for_anon(client, news):
     assert response.status_code == HTTPStatus.OK
 
 
+@pytest.mark.django_db
+def test_home_page_not_modified(
+    client, news, author, django_assert_num_queries
+):
+    """
+    Повторный запрос главной страницы с тем же ETag получает ответ 304
+    после одного запроса версии, без рендеринга шаблона. Новый
+    комментарий меняет версию страницы.
+    """
+    url = reverse('news:home')
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.templates
+    Comment.objects.create(news=news, author=author, text=NEW_TEXT)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_news_page_not_modified(
+    author_client, news, django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Страница новости отдаёт ETag и Last-Modified по версии фрагментов
+    в кэше, поэтому ответ 304 обходится без запросов к базе данных.
+    У разных пользователей разные ETag.
+    """
+    client = Client()
+    url = reverse('news:detail', kwargs={'pk': news.pk})
+    response = client.get(url)
+    etag = response['ETag']
+    assert response.has_header('Last-Modified')
+    assert author_client.get(url)['ETag'] != etag
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(url, data={'text': NEW_TEXT})
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor, expected_status',
+    (
+        ('', HTTPStatus.OK),
+        ('не-курсор', HTTPStatus.BAD_REQUEST),
+    ),
+)
+def test_comments_page_access_for_anon(client, news, cursor, expected_status):
+    """
+    Порция комментариев доступна анонимному пользователю,
+    некорректный курсор отклоняется.
+    """
+    url = reverse('news:comments', kwargs={'pk': news.pk})
+    response = client.get(url, {'after': cursor})
+    assert response.status_code == expected_status
+
+
 @pytest.mark.parametrize(
     'parametrized_client, expected_status',
     (
@@ -0,0 +1,168 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from news.factories import make_comments, make_news
+from news.models import Comment, News, SearchPosting
+from news.pipeline import run_worker
+from news.search import search, tokenize
+
+SEARCH_TEXT = 'Новости о полётах в космос с орбиты'
+CASCADE_COMMENTS_COUNT = 200
+# Удаление индекса новости, выборка комментариев, их удаление пачками
+# по 100 и удаление новости. Раньше каждый комментарий ещё сдвигал
+# счётчик и удалял свои строки индекса: 405 запросов на 200 комментариев.
+CASCADE_DELETE_QUERIES = 5
+
+
+def found(query):
+    """Документы, найденные по запросу, в порядке ранжирования."""
+    return [(row['kind'], row['object_id']) for row in search(query)]
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    (
+        ('Новости и новостями', ['новост', 'новост']),
+        ('Ёлка на ёлке', ['елк', 'елк']),
+        ('Running tests', ['run', 'test']),
+        ('', []),
+    ),
+)
+def test_tokenize_stems_words(text, expected):
+    """Слова приводятся к основе, стоп-слова отбрасываются."""
+    assert tokenize(text) == expected
+
+
+@pytest.mark.django_db
+def test_search_finds_news_and_comments(news, author):
+    """
+    Поиск находит новость и опубликованный комментарий по любой
+    форме слова, новость с совпадением в заголовке выше.
+    """
+    title_news = News.objects.create(title='Космос', text='Текст')
+    comment = Comment.objects.create(
+        news=news, author=author, text=SEARCH_TEXT
+    )
+    assert found('космосе') == [
+        (SearchPosting.Kind.NEWS, title_news.pk),
+        (SearchPosting.Kind.COMMENT, comment.pk),
+    ]
+    assert found('и') == []
+
+
+@pytest.mark.django_db
+def test_search_finds_documents_with_all_words(news, author):
+    """
+    По нескольким словам находятся только документы со всеми словами,
+    выше — документ, где больше весит самое редкое из них.
+    """
+    News.objects.create(title='Космос', text='Текст')
+    title_news = News.objects.create(title='Орбита', text='Полёт в космос')
+    comment = Comment.objects.create(
+        news=news, author=author, text=SEARCH_TEXT
+    )
+    assert found('космос орбита') == [
+        (SearchPosting.Kind.NEWS, title_news.pk),
+        (SearchPosting.Kind.COMMENT, comment.pk),
+    ]
+    assert found('космос марс') == []
+
+
+@pytest.mark.django_db
+def test_search_index_follows_writes(news, author, settings):
+    """
+    Индекс следит за изменением и удалением документов, комментарии
+    попадают в него только после публикации.
+    """
+    settings.COMMENT_MODERATION_QUEUE = True
+    comment = Comment.objects.create(
+        news=news, author=author, text=SEARCH_TEXT,
+        status=Comment.Status.PENDING,
+    )
+    assert found('орбита') == []
+    run_worker(once=True)
+    assert found('орбита') == [(SearchPosting.Kind.COMMENT, comment.pk)]
+    comment.text = 'Другой текст'
+    comment.save()
+    assert found('орбита') == []
+    news.text = 'Станция вышла на орбиту'
+    news.save()
+    assert found('орбита') == [(SearchPosting.Kind.NEWS, news.pk)]
+    news.delete()
+    assert not SearchPosting.objects.exists()
+
+
+@pytest.mark.django_db
+def test_news_delete_removes_comments_in_bulk(
+    author, django_assert_max_num_queries
+):
+    """
+    Удаление новости убирает из индекса её комментарии одним запросом
+    и не трогает счётчики и индекс остальных новостей.
+    """
+    news, other = make_news(2)
+    make_comments([news, other], [author], CASCADE_COMMENTS_COUNT)
+    call_command('rebuild_search_index', stdout=StringIO())
+    other_postings = SearchPosting.objects.filter(news_id=other.pk).count()
+    with django_assert_max_num_queries(CASCADE_DELETE_QUERIES):
+        news.delete()
+    assert not SearchPosting.objects.filter(news_id=news.pk).exists()
+    assert SearchPosting.objects.count() == other_postings
+    other.refresh_from_db()
+    assert other.comment_count == CASCADE_COMMENTS_COUNT
+    comment = Comment.objects.filter(news=other).first()
+    comment.delete()
+    other.refresh_from_db()
+    assert other.comment_count == CASCADE_COMMENTS_COUNT - 1
+    assert not SearchPosting.objects.filter(
+        kind=SearchPosting.Kind.COMMENT, object_id=comment.pk
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(news, comment):
+    """Команда rebuild_search_index строит индекс заново пачками."""
+    expected = sorted(SearchPosting.objects.values_list('term', 'object_id'))
+    SearchPosting.objects.all().delete()
+    out = StringIO()
+    call_command('rebuild_search_index', batch_size=1, stdout=out)
+    assert 'Проиндексировано документов: 2' in out.getvalue()
+    assert sorted(
+        SearchPosting.objects.values_list('term', 'object_id')
+    ) == expected
+
+
+@pytest.mark.django_db
+def test_search_page_is_paginated(client, author, news, settings):
+    """
+    Страница поиска выводит результаты постранично и не считает
+    общее число результатов.
+    """
+    settings.SEARCH_PAGE_SIZE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'{SEARCH_TEXT} {index}')
+        for index in range(3)
+    )
+    call_command('rebuild_search_index', stdout=StringIO())
+    url = reverse('news:search')
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {'q': 'орбита'})
+    assert response.status_code == HTTPStatus.OK
+    assert not any(
+        'COUNT(*)' in query['sql'] for query in context.captured_queries
+    )
+    assert len(response.context['results']) == 2
+    assert response.context['has_next']
+    response = client.get(url, {'q': 'орбита', 'page': 2})
+    assert len(response.context['results']) == 1
+    assert not response.context['has_next']
+    for page in (3, 0, 'последняя'):
+        response = client.get(url, {'q': 'орбита', 'page': page})
+        assert response.status_code == HTTPStatus.NOT_FOUND
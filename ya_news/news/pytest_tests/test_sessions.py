@@ -0,0 +1,135 @@
+import runpy
+import time
+from http import HTTPStatus
+
+from django.test import Client
+from django.urls import reverse
+
+import pytest
+
+from yanews import sessions
+from yanews import settings as project_settings
+from yanews.benchmarks import QUERIES, logger
+from yanews.cache import NamespacedCache
+from yanews.sessions import CachedModelBackend
+
+THROUGHPUT_REQUESTS = 300
+# Было: сессия и пользователь из базы; стало: движки сессий
+# с пользователем из кэша.
+SESSION_SETUPS = (
+    ('db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached-db', 'yanews.sessions.CachedModelBackend'),
+    ('signed-cookies', 'yanews.sessions.CachedModelBackend'),
+)
+
+
+@pytest.mark.django_db
+def test_user_is_read_from_cache(author, django_assert_num_queries):
+    """Пользователь сессии читается из базы один раз."""
+    backend = CachedModelBackend()
+    with django_assert_num_queries(1):
+        assert backend.get_user(author.pk) == author
+        assert backend.get_user(author.pk) == author
+
+
+@pytest.mark.django_db
+def test_password_change_ends_other_sessions(author, author_client, comment):
+    """
+    Смена пароля сбрасывает пользователя в кэше, и остальные
+    сессии пользователя завершаются.
+    """
+    url = reverse('news:edit', args=(comment.pk,))
+    assert author_client.get(url).status_code == HTTPStatus.OK
+    author.set_password('Новый пароль')
+    author.save()
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url.startswith(reverse('users:login'))
+
+
+@pytest.mark.parametrize(
+    'cache_backend, session_engine, auth_backend',
+    (
+        ('locmem', 'db', 'django.contrib.auth.backends.ModelBackend'),
+        ('memcached-standin', 'db',
+         'django.contrib.auth.backends.ModelBackend'),
+        ('file', 'cached_db', 'yanews.sessions.CachedModelBackend'),
+        ('memcached', 'cached_db', 'yanews.sessions.CachedModelBackend'),
+    ),
+)
+def test_session_defaults_follow_cache(
+    monkeypatch, cache_backend, session_engine, auth_backend
+):
+    """Сессии и пользователь берутся из кэша, только если он общий."""
+    monkeypatch.setenv('CACHE_BACKEND', cache_backend)
+    monkeypatch.delenv('SESSION_BACKEND', raising=False)
+    values = runpy.run_path(project_settings.__file__)
+    assert values['SESSION_ENGINE'].endswith(session_engine)
+    assert values['AUTHENTICATION_BACKENDS'] == [auth_backend]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'backend, other_location, shared',
+    (('file', '', True), ('locmem', 'other', False)),
+)
+def test_user_change_reaches_other_process(
+    settings, tmp_path, monkeypatch, django_capture_on_commit_callbacks,
+    author, backend, other_location, shared,
+):
+    """
+    Сохранение пользователя сбрасывает его в кэше другого процесса
+    только при общем кэше. Процессы изображают два экземпляра кэша:
+    file на одном каталоге или locmem с разными LOCATION.
+    """
+    settings.CACHES = {
+        alias: {
+            **settings.CACHE_BACKENDS[backend],
+            'LOCATION': f'{tmp_path}{location}',
+        }
+        for alias, location in (('default', ''), ('other', other_location))
+    }
+    cached_backend = CachedModelBackend()
+    monkeypatch.setattr(
+        sessions, 'auth_cache', NamespacedCache('auth', alias='other')
+    )
+    assert cached_backend.get_user(author.pk).username == author.username
+    monkeypatch.setattr(sessions, 'auth_cache', NamespacedCache('auth'))
+    author.username = 'Новое имя'
+    with django_capture_on_commit_callbacks(execute=True):
+        author.save()
+    monkeypatch.setattr(
+        sessions, 'auth_cache', NamespacedCache('auth', alias='other')
+    )
+    user = cached_backend.get_user(author.pk)
+    assert (user.username == 'Новое имя') is shared
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_authenticated_throughput(settings, author, comment):
+    """
+    С сессией и пользователем из кэша авторизованный запрос обходится
+    без обращений к базе за ними.
+    """
+    url = reverse('news:edit', args=(comment.pk,))
+    queries = {}
+    for engine, backend in SESSION_SETUPS:
+        settings.SESSION_ENGINE = settings.SESSION_ENGINES[engine]
+        settings.AUTHENTICATION_BACKENDS = [backend]
+        client = Client()
+        client.force_login(author)
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(THROUGHPUT_REQUESTS):
+            response = client.get(url)
+        elapsed = time.perf_counter() - started
+        queries[engine] = int(
+            QUERIES.search(response['Server-Timing']).group(1)
+        )
+        logger.info(
+            f'{engine}: {THROUGHPUT_REQUESTS / elapsed:.0f} запросов/с, '
+            f'{queries[engine]} запросов к базе'
+        )
+    assert queries['cached-db'] == queries['signed-cookies']
+    assert queries['cached-db'] == queries['db'] - 2
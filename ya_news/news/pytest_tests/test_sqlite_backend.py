@@ -0,0 +1,231 @@
+import runpy
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+
+import pytest
+
+from yanews import settings as project_settings
+from yanews.benchmarks import logger
+
+DEFAULT_ENGINE = 'django.db.backends.sqlite3'
+PRODUCTION_ENGINE = 'yanews.sqlite_backend'
+BENCHMARK_SECONDS = 3
+READERS = 4
+WRITERS = 2
+SEED_ROWS = 10_000
+
+
+def connect(path, engine=PRODUCTION_ENGINE, **options):
+    """Соединение с файлом path вне общего списка баз проекта."""
+    return ConnectionHandler({'default': {
+        'ENGINE': engine, 'NAME': str(path), 'OPTIONS': options,
+    }})['default']
+
+
+def begin(connection):
+    """Начинает транзакцию так же, как transaction.atomic."""
+    connection.set_autocommit(
+        False, force_begin_transaction_with_broken_autocommit=True
+    )
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_pragmas_are_applied_on_connect(tmp_path):
+    """При подключении включается WAL и остальные PRAGMA."""
+    connection = connect(tmp_path / 'db.sqlite3')
+    assert pragma(connection, 'journal_mode') == 'wal'
+    assert pragma(connection, 'synchronous') == 1
+    assert pragma(connection, 'busy_timeout') == 5000
+    connection.close()
+    connection = connect(
+        tmp_path / 'db.sqlite3', pragmas={'busy_timeout': 100}
+    )
+    assert pragma(connection, 'busy_timeout') == 100
+    connection.close()
+
+
+@pytest.mark.django_db
+def test_transaction_takes_write_lock_immediately(tmp_path):
+    """
+    Транзакция сразу берёт блокировку записи: вторая транзакция ждёт
+    её, а не падает позже при попытке записать.
+    """
+    first = connect(tmp_path / 'db.sqlite3')
+    second = connect(tmp_path / 'db.sqlite3', pragmas={'busy_timeout': 0})
+    begin(first)
+    with pytest.raises(OperationalError, match='locked'):
+        begin(second)
+    first.rollback()
+    first.set_autocommit(True)
+    first.close()
+    second.close()
+
+
+@pytest.mark.django_db
+def test_broken_persistent_connection_is_replaced(tmp_path):
+    """
+    Неработающее постоянное соединение заменяется новым при первом
+    обращении к базе в следующем запросе.
+    """
+    connection = connect(tmp_path / 'db.sqlite3')
+    connection.settings_dict['CONN_MAX_AGE'] = 600
+    connection.ensure_connection()
+    connection.close_if_unusable_or_obsolete()
+    broken = connection.connection
+    broken.close()
+    connection.close_if_unusable_or_obsolete()
+    assert pragma(connection, 'journal_mode') == 'wal'
+    assert connection.connection is not broken
+    connection.close()
+
+
+@pytest.mark.django_db
+def test_connection_is_checked_once_per_request(tmp_path, monkeypatch):
+    """
+    Новое соединение не проверяется, постоянное — один раз за запрос,
+    а не используемое в запросе не проверяется вовсе.
+    """
+    connection = connect(tmp_path / 'db.sqlite3')
+    connection.settings_dict['CONN_MAX_AGE'] = 600
+    checks = []
+    monkeypatch.setattr(
+        connection, 'is_usable', lambda: checks.append(1) or True
+    )
+    pragma(connection, 'journal_mode')
+    assert checks == []
+    for _ in range(2):
+        connection.close_if_unusable_or_obsolete()
+        pragma(connection, 'journal_mode')
+        pragma(connection, 'synchronous')
+        connection.close_if_unusable_or_obsolete()
+    assert len(checks) == 2
+    connection.close()
+
+
+@pytest.mark.parametrize(
+    'replica_name, replicas',
+    (
+        (None, []),
+        (str(project_settings.BASE_DIR / 'db.sqlite3'), []),
+        ('/srv/replica.sqlite3', ['replica']),
+    ),
+)
+def test_replica_in_primary_file_is_not_used(
+    monkeypatch, replica_name, replicas
+):
+    """Реплика в файле основной базы не попадает в DATABASE_REPLICAS."""
+    if replica_name is None:
+        monkeypatch.delenv('DB_REPLICA_NAME', raising=False)
+    else:
+        monkeypatch.setenv('DB_REPLICA_NAME', replica_name)
+    values = runpy.run_path(project_settings.__file__)
+    assert values['DATABASE_REPLICAS'] == replicas
+
+
+def read(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT id, value FROM item ORDER BY id DESC LIMIT 20')
+        cursor.fetchall()
+
+
+def write(connection):
+    begin(connection)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO item (value) VALUES (%s)', ['значение']
+            )
+        connection.commit()
+    except OperationalError:
+        connection.rollback()
+        raise
+    finally:
+        connection.set_autocommit(True)
+
+
+def run_load(path, engine, persistent):
+    """
+    Читатели и писатели работают BENCHMARK_SECONDS секунд.
+
+    Без постоянных соединений каждая операция открывает новое, как
+    запрос при CONN_MAX_AGE = 0. Возвращает число чтений, записей
+    и ошибок «database is locked».
+    """
+    counters = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + BENCHMARK_SECONDS
+
+    def worker(operation, counter):
+        connection = connect(path, engine)
+        while time.monotonic() < deadline:
+            try:
+                operation(connection)
+            except OperationalError:
+                with lock:
+                    counters['errors'] += 1
+                continue
+            with lock:
+                counters[counter] += 1
+            if not persistent:
+                connection.close()
+        connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(read, 'reads'))
+        for _ in range(READERS)
+    ] + [
+        threading.Thread(target=worker, args=(write, 'writes'))
+        for _ in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_production_mode_throughput(tmp_path):
+    """
+    Параллельные чтения и записи в файловую базу: обычный бэкенд
+    с новым соединением на каждый запрос против режима для продакшена.
+    """
+    results = {}
+    for engine, persistent in (
+        (DEFAULT_ENGINE, False),
+        (PRODUCTION_ENGINE, True),
+    ):
+        path = tmp_path / f'{engine}.sqlite3'
+        connection = connect(path, engine)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE item ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, value TEXT)'
+            )
+            cursor.executemany(
+                'INSERT INTO item (value) VALUES (%s)',
+                [['значение']] * SEED_ROWS,
+            )
+        connection.close()
+        results[engine] = run_load(path, engine, persistent)
+        logger.info(
+            f'{engine}: '
+            + ', '.join(
+                f'{name} {count / BENCHMARK_SECONDS:.0f}/с'
+                for name, count in results[engine].items()
+            )
+        )
+    default, production = results[DEFAULT_ENGINE], results[PRODUCTION_ENGINE]
+    assert production['reads'] > default['reads']
+    assert production['writes'] > default['writes']
+    assert production['errors'] == 0
@@ -0,0 +1,151 @@
+import json
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.test import Client
+from django.urls import reverse
+
+import pytest
+
+from news.factories import make_comments, make_news
+from news.models import Comment
+from news.search import rebuild_index
+from yanews.benchmarks import (
+    QUERIES, Case, Result, check_baseline, client_request, compare,
+    format_results, logger, run_cases,
+)
+from yanews.factories import make_users
+
+BASELINE = Path(__file__).with_name('benchmark_baseline.json')
+USERS_COUNT = 100
+NEWS_COUNT = 1000
+COMMENTS_PER_NEWS = 20
+SEARCH_QUERY = 'новости'
+
+
+@pytest.fixture
+def site():
+    """Сайт с тысячей новостей, по 20 комментариев на каждую."""
+    authors = list(make_users(USERS_COUNT))
+    staff = make_users(1, prefix='Сотрудник', is_staff=True).get()
+    news = list(make_news(NEWS_COUNT))
+    make_comments(news, authors, COMMENTS_PER_NEWS)
+    rebuild_index()
+    comment = Comment.objects.filter(news=news[0], author=authors[0]).first()
+    return authors[0], staff, news[0], comment
+
+
+def url_cases(author, staff, news, comment):
+    """Все страницы news.urls и auth/ с ожидаемыми статусами ответа."""
+    return (
+        Case('news:home', reverse('news:home'), None, HTTPStatus.OK),
+        Case(
+            'news:detail', reverse('news:detail', args=(news.pk,)),
+            author, HTTPStatus.OK,
+        ),
+        Case(
+            'news:comments', reverse('news:comments', args=(news.pk,)),
+            None, HTTPStatus.OK,
+        ),
+        Case(
+            'news:edit', reverse('news:edit', args=(comment.pk,)),
+            author, HTTPStatus.OK,
+        ),
+        Case(
+            'news:delete', reverse('news:delete', args=(comment.pk,)),
+            author, HTTPStatus.OK,
+        ),
+        Case(
+            'news:search',
+            reverse('news:search') + '?' + urlencode({'q': SEARCH_QUERY}),
+            None, HTTPStatus.OK,
+        ),
+        Case(
+            'news:export', reverse('news:export', args=('news',)),
+            staff, HTTPStatus.OK,
+        ),
+        Case('users:login', reverse('users:login'), None, HTTPStatus.OK),
+        Case('users:logout', reverse('users:logout'), None, HTTPStatus.OK),
+        Case('users:signup', reverse('users:signup'), None, HTTPStatus.OK),
+    )
+
+
+def make_client(user):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def test_compare_reports_only_regressions():
+    """
+    Регрессия — лишний запрос или время и память сверх допусков;
+    страницы без базовой линии и неизвестное число запросов
+    не сравниваются.
+    """
+    baseline = {'wsgi': {'news:home': Result(10, 20, 2, 100)._asdict()}}
+    within_limits = {'wsgi': {'news:home': Result(20, 65, 2, 189)}}
+    assert compare(within_limits, baseline) == []
+    streaming = {'wsgi': {'news:home': Result(10, 20, None, 100)}}
+    assert compare(streaming, baseline) == []
+    regressions = compare(
+        {
+            'wsgi': {'news:home': Result(21, 66, 3, 190)},
+            'in-process': {'news:home': Result(100, 100, 10, 1000)},
+        },
+        baseline,
+    )
+    assert len(regressions) == 4
+
+
+def test_timings_are_compared_only_on_request(tmp_path, monkeypatch):
+    """
+    В базовую линию репозитория записывается только число запросов,
+    время и память сравниваются с файлом из BENCHMARK_TIMINGS.
+    """
+    for name in ('BENCHMARK_TIMINGS', 'BENCHMARK_UPDATE_BASELINE'):
+        monkeypatch.delenv(name, raising=False)
+    baseline, timings = tmp_path / 'baseline.json', tmp_path / 'timings.json'
+    check_baseline({'wsgi': {'news:home': Result(10, 20, 2, 100)}}, baseline)
+    assert json.loads(baseline.read_text()) == {
+        'wsgi': {'news:home': {'queries': 2}}
+    }
+    slower = {'wsgi': {'news:home': Result(100, 200, 2, 1000)}}
+    assert check_baseline(slower, baseline) == []
+    monkeypatch.setenv('BENCHMARK_TIMINGS', str(timings))
+    check_baseline({'wsgi': {'news:home': Result(10, 20, 2, 100)}}, baseline)
+    assert len(check_baseline(slower, baseline)) == 3
+
+
+@pytest.mark.django_db
+def test_streaming_queries_are_counted(admin_client, news, comment):
+    """
+    Запросы, выполненные при чтении тела потокового ответа, входят
+    в число запросов страницы, хотя Server-Timing их не видит.
+    """
+    url = reverse('news:export', args=('comments',))
+    status, queries = client_request(admin_client, url)()
+    assert status == HTTPStatus.OK
+    response = admin_client.get(url)
+    b''.join(response.streaming_content)
+    assert queries > int(
+        QUERIES.search(response['Server-Timing']).group(1)
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_pages_do_not_regress(site, live_server):
+    """
+    Число запросов каждой страницы в процессе и через WSGI-сервер
+    не больше базовой линии, время ответа и пик памяти не хуже замеров
+    из BENCHMARK_TIMINGS.
+    """
+    results, errors = run_cases(
+        url_cases(*site), make_client, live_server.url
+    )
+    logger.info(f'{format_results(results)}')
+    assert not errors
+    regressions = check_baseline(results, BASELINE)
+    assert not regressions, '\n'.join(regressions)
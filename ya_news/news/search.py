@@ -0,0 +1,286 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+Инвертированный индекс хранится в SearchPosting: для каждого документа
+(новости или опубликованного комментария) — по строке на основу слова
+с её весом в документе. Сигналы обновляют индекс в той же транзакции,
+что и сам документ, а manage.py rebuild_search_index строит его заново.
+
+Текст разбивается на слова, стоп-слова отбрасываются, остальные слова
+приводятся к основе стеммером Snowball (русским или английским). Вес
+основы растёт с числом её повторов с насыщением, как в BM25, слова
+заголовка новости весят больше. Оценка документа — сумма весов основ
+запроса, умноженных на их IDF.
+
+Находятся документы со всеми основами запроса. Поиск обходит строки
+индекса самой редкой из них по убыванию веса и оставляет документы,
+в которых есть остальные основы, поэтому страница результатов читает
+не больше строк, чем у редкой основы, и останавливается, набрав строки
+страницы.
+"""
+import math
+import re
+import threading
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count, Exists, ExpressionWrapper, F, FloatField, OuterRef, Subquery,
+    Sum, Value,
+)
+
+import snowballstemmer
+
+from .cache import news_cache
+from .models import Comment, News, SearchPosting
+
+WORD = re.compile(r'\w+')
+FREQUENCY_KEY = 'search:frequency:{term}'
+TERM_MAX_LENGTH = SearchPosting._meta.get_field('term').max_length
+TITLE_WEIGHT = 3
+# Насыщение веса при повторах слова (k1 в BM25).
+SATURATION = 1.2
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'всё', 'да', 'до', 'его',
+    'ее', 'её', 'ей', 'если', 'же', 'за', 'и', 'из', 'или', 'им', 'их',
+    'к', 'как', 'ко', 'ли', 'мы', 'на', 'над', 'не', 'него', 'нет', 'ни',
+    'но', 'о', 'об', 'он', 'она', 'они', 'оно', 'от', 'по', 'под', 'при',
+    'про', 'с', 'со', 'так', 'также', 'то', 'тот', 'у', 'уже', 'что',
+    'чтобы', 'это', 'я', 'a', 'an', 'and', 'in', 'of', 'on', 'or', 'the',
+    'to',
+))
+
+Result = namedtuple('Result', ('kind', 'document', 'score'))
+
+_stemmers = {
+    'russian': snowballstemmer.stemmer('russian'),
+    'english': snowballstemmer.stemmer('english'),
+}
+# Стеммеры Snowball хранят состояние между вызовами.
+_stemmer_lock = threading.Lock()
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа слова; латиница обрабатывается английским стеммером."""
+    language = 'english' if word.isascii() else 'russian'
+    with _stemmer_lock:
+        return _stemmers[language].stemWord(word)[:TERM_MAX_LENGTH]
+
+
+def tokenize(text):
+    """Основы значимых слов текста в порядке следования."""
+    return [
+        stem(word)
+        for word in WORD.findall(text.lower().replace('ё', 'е'))
+        if word not in STOP_WORDS
+    ]
+
+
+def term_weights(*fields):
+    """Веса основ документа по парам (текст поля, множитель поля)."""
+    counts = Counter()
+    for text, multiplier in fields:
+        for term in tokenize(text):
+            counts[term] += multiplier
+    return {
+        term: count * (SATURATION + 1) / (count + SATURATION)
+        for term, count in counts.items()
+    }
+
+
+def news_postings(news):
+    return [
+        SearchPosting(
+            term=term,
+            kind=SearchPosting.Kind.NEWS,
+            object_id=news.pk,
+            news_id=news.pk,
+            weight=weight,
+        )
+        for term, weight in term_weights(
+            (news.title, TITLE_WEIGHT), (news.text, 1)
+        ).items()
+    ]
+
+
+def comment_postings(comment):
+    return [
+        SearchPosting(
+            term=term,
+            kind=SearchPosting.Kind.COMMENT,
+            object_id=comment.pk,
+            news_id=comment.news_id,
+            weight=weight,
+        )
+        for term, weight in term_weights((comment.text, 1)).items()
+    ]
+
+
+def remove_document(kind, pk):
+    SearchPosting.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def index_news(news, created=False):
+    """Индексирует новость; старые строки индекса удаляются."""
+    if not created:
+        remove_document(SearchPosting.Kind.NEWS, news.pk)
+    SearchPosting.objects.bulk_create(news_postings(news))
+
+
+def index_comment(comment, created=False):
+    """В индекс попадают только опубликованные комментарии."""
+    if not created:
+        remove_document(SearchPosting.Kind.COMMENT, comment.pk)
+    if comment.status == Comment.Status.PUBLISHED:
+        SearchPosting.objects.bulk_create(comment_postings(comment))
+
+
+def index_comments(comments):
+    """Добавляет в индекс пачку только что опубликованных комментариев."""
+    SearchPosting.objects.bulk_create(
+        posting for comment in comments
+        for posting in comment_postings(comment)
+    )
+
+
+def term_frequencies(terms):
+    """
+    Число документов с каждой из основ, которые есть в индексе.
+
+    Для IDF точное значение не нужно, а подсчёт частого слова читает
+    сотни тысяч строк индекса, поэтому ненулевые значения кэшируются
+    на SEARCH_FREQUENCY_TIMEOUT секунд.
+    """
+    keys = {FREQUENCY_KEY.format(term=term): term for term in terms}
+    frequencies = {
+        keys[key]: count for key, count in news_cache.get_many(keys).items()
+    }
+    missing = terms - frequencies.keys()
+    if missing:
+        counted = dict(
+            SearchPosting.objects.filter(term__in=missing)
+            .values('term').annotate(count=Count('pk'))
+            .values_list('term', 'count')
+        )
+        for term, count in counted.items():
+            news_cache.set(
+                FREQUENCY_KEY.format(term=term),
+                count,
+                settings.SEARCH_FREQUENCY_TIMEOUT,
+            )
+        frequencies.update(counted)
+    return frequencies
+
+
+def search(query):
+    """
+    Строки результатов (вид, номер, новость, оценка) документов со всеми
+    основами запроса.
+
+    Строки упорядочены по весу самой редкой основы: у неё наибольший IDF.
+    Число документов берётся из счётчиков News, частоты основ —
+    из term_frequencies.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return SearchPosting.objects.none()
+    frequencies = term_frequencies(terms)
+    if len(frequencies) < len(terms):
+        return SearchPosting.objects.none()
+    totals = News.objects.aggregate(
+        news=Count('pk'), comments=Sum('comment_count')
+    )
+    documents = totals['news'] + (totals['comments'] or 0)
+    idf = {
+        term: math.log(1 + documents / count)
+        for term, count in frequencies.items()
+    }
+    rarest = min(frequencies, key=lambda term: (frequencies[term], term))
+    postings = SearchPosting.objects.filter(term=rarest)
+    score = F('weight') * Value(idf[rarest])
+    for term in sorted(terms - {rarest}, key=frequencies.get):
+        # Основа документа ищется по индексу (kind, object_id): строк
+        # у документа немного.
+        other = SearchPosting.objects.filter(
+            kind=OuterRef('kind'), object_id=OuterRef('object_id'),
+            term=term,
+        )
+        postings = postings.filter(Exists(other))
+        score = score + Subquery(other.values('weight')[:1]) * Value(
+            idf[term]
+        )
+    return postings.values('kind', 'object_id', 'news_id').annotate(
+        score=ExpressionWrapper(score, output_field=FloatField())
+    ).order_by('-weight', '-kind', '-object_id')
+
+
+def load_results(rows):
+    """Загружает новости и комментарии для строк страницы результатов."""
+    ids = {kind: set() for kind in SearchPosting.Kind}
+    for row in rows:
+        ids[row['kind']].add(row['object_id'])
+    documents = {
+        SearchPosting.Kind.NEWS: News.objects.in_bulk(
+            ids[SearchPosting.Kind.NEWS]
+        ),
+        SearchPosting.Kind.COMMENT: Comment.objects.select_related(
+            'news', 'author'
+        ).in_bulk(ids[SearchPosting.Kind.COMMENT]),
+    }
+    return [
+        Result(
+            SearchPosting.Kind(row['kind']),
+            documents[row['kind']][row['object_id']],
+            row['score'],
+        )
+        for row in rows
+        if row['object_id'] in documents[row['kind']]
+    ]
+
+
+def batches(queryset, batch_size):
+    """Обходит queryset пачками по возрастанию первичного ключа."""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[
+            :batch_size
+        ])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Строит индекс заново пачками документов; возвращает их число.
+
+    Каждая пачка индексируется в своей транзакции, чтобы не держать
+    блокировку базы на всё время перестроения.
+    """
+    SearchPosting.objects.all().delete()
+    documents = 0
+    sources = (
+        (News.objects.only('title', 'text'), news_postings),
+        (
+            Comment.objects.filter(status=Comment.Status.PUBLISHED).only(
+                'news', 'text'
+            ),
+            comment_postings,
+        ),
+    )
+    for queryset, make_postings in sources:
+        for batch in batches(queryset, batch_size):
+            with transaction.atomic():
+                SearchPosting.objects.bulk_create(
+                    (
+                        posting for document in batch
+                        for posting in make_postings(document)
+                    ),
+                    batch_size=batch_size,
+                )
+            documents += len(batch)
+    return documents
@@ -0,0 +1,103 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .counters import change_comment_count
+from .forms import bad_words
+from .models import Comment, ModerationTerm, News, SearchPosting
+from .search import index_comment, index_news, remove_document
+
+# Новости, которые удаляются в этом потоке вместе с комментариями.
+_deleting = threading.local()
+
+
+def news_is_deleted(news_pk):
+    """Комментарий удаляется каскадом вместе со своей новостью."""
+    return news_pk in getattr(_deleting, 'news', ())
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, **kwargs):
+    """Изменение новости сбрасывает кэш её страницы."""
+    news_pk = instance.pk
+    transaction.on_commit(lambda: bump_version(news_pk))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """
+    Создание, редактирование и удаление комментария, в том числе через
+    админку, сбрасывает кэш страницы новости.
+    """
+    news_pk = instance.news_id
+    if news_is_deleted(news_pk):
+        return
+    transaction.on_commit(lambda: bump_version(news_pk))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """Новый опубликованный комментарий увеличивает счётчик новости."""
+    if created and instance.status == Comment.Status.PUBLISHED:
+        change_comment_count(instance.news_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Удаление опубликованного комментария уменьшает счётчик новости."""
+    if (
+        instance.status == Comment.Status.PUBLISHED
+        and not news_is_deleted(instance.news_id)
+    ):
+        change_comment_count(instance.news_id, -1)
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, created, **kwargs):
+    """Поисковый индекс обновляется в одной транзакции с новостью."""
+    index_news(instance, created)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    """
+    Опубликованный комментарий попадает в поисковый индекс,
+    скрытый или ожидающий модерации — убирается из него.
+    """
+    index_comment(instance, created)
+
+
+@receiver(pre_delete, sender=News)
+def news_deleting(sender, instance, **kwargs):
+    """
+    Строки индекса новости и всех её комментариев удаляются одним
+    запросом. Пока каскад удаляет комментарии, их обработчики не трогают
+    ни счётчик, ни индекс, ни кэш страницы удаляемой новости.
+    """
+    SearchPosting.objects.filter(news_id=instance.pk).delete()
+    if not hasattr(_deleting, 'news'):
+        _deleting.news = set()
+    _deleting.news.add(instance.pk)
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    _deleting.news.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def document_deleted(sender, instance, **kwargs):
+    if not news_is_deleted(instance.news_id):
+        remove_document(SearchPosting.Kind.COMMENT, instance.pk)
+
+
+@receiver((post_save, post_delete), sender=ModerationTerm)
+def moderation_term_changed(sender, instance, **kwargs):
+    """
+    Изменение словаря модерации сразу перестраивает автомат процесса,
+    остальные процессы заметят новую версию в кэше при очередной сверке.
+    """
+    transaction.on_commit(bad_words.reload)
@@ -7,7 +7,11 @@ app_name = 'news'
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('news/<int:pk>/comments/', views.NewsCommentsPage.as_view(),
+         name='comments'),
     path('delete_comment/<int:pk>/', views.CommentDelete.as_view(),
          name='delete'),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('export/<slug:kind>/', views.export, name='export'),
 ]
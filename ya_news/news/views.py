@@ -1,11 +1,57 @@
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import partial
+
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import transaction
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import generic
 
+from yanews.conditional import conditional_get, make_etag, per_request
+from yanews.routers import pin_to_primary
+
+from . import cache, search
+from .export import CONTENT_TYPES, FORMATS, SOURCES, parse_since, render_lines
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import get_comments_page, get_page, page_number
+
+
+def news_list_etag(request):
+    """
+    Версия главной страницы: номера, время изменения и счётчики
+    комментариев выводимых новостей, читаются по индексу (date, id).
+    """
+    return make_etag(request, *News.objects.values_list(
+        'pk', 'modified', 'comment_count'
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE])
+
+
+@per_request
+def news_detail_version(request, pk):
+    """
+    Версия страницы новости совпадает с версией её фрагментов в кэше:
+    любое изменение новости или комментариев меняет обе.
+    """
+    return cache.get_version(pk)
+
+
+def news_detail_etag(request, pk):
+    return make_etag(request, news_detail_version(request, pk))
+
+
+def news_detail_last_modified(request, pk):
+    """Версия фрагментов — время последнего изменения в наносекундах."""
+    return datetime.fromtimestamp(
+        news_detail_version(request, pk) / 10**9, tz=timezone.utc
+    )
 
 
 class NewsList(generic.ListView):
@@ -13,27 +59,117 @@ class NewsList(generic.ListView):
     model = News
     template_name = 'news/home.html'
 
+    @conditional_get(etag_func=news_list_etag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Число комментариев
+        хранится в самой новости, таблица комментариев не читается.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+class NewsFragmentsMixin:
+    """
+    Страница новости собирается из фрагментов «статья» и «комментарии».
 
+    Фрагменты без персональных данных кэшируются по номеру новости и версии,
+    которая меняется при любом изменении новости или её комментариев.
+    Комментарии авторизованного пользователя содержат ссылки на
+    редактирование и удаление, поэтому для него они рендерятся вне кэша.
 
-class NewsDetail(generic.DetailView):
+    Версия — время изменения. Пока она моложе REPLICA_PIN_SECONDS,
+    реплика может ещё не видеть изменения, поэтому такие фрагменты
+    собираются из основной базы: иначе устаревшая страница попала бы
+    в кэш под новой версией до следующего изменения.
+    """
+    fragment_templates = {
+        'article_html': 'news/article.html',
+        'comments_html': 'news/comments.html',
+    }
+
+    def get_cached_fragments(self):
+        if not hasattr(self, 'cached_fragments'):
+            self.fragments_version = news_detail_version(
+                self.request, self.kwargs['pk']
+            )
+            self.cached_fragments = cache.get_fragments(
+                self.kwargs['pk'],
+                self.fragments_version,
+                self.fragment_templates,
+            )
+        return self.cached_fragments
+
+    def reads_primary(self):
+        """Контекст чтения для сборки фрагментов текущей версии."""
+        self.get_cached_fragments()
+        age = time.time_ns() - self.fragments_version
+        if age < settings.REPLICA_PIN_SECONDS * 10**9:
+            return pin_to_primary()
+        return nullcontext()
+
+    def get_personal_fragments(self):
+        """Фрагменты, которые для этого пользователя рендерятся вне кэша."""
+        if self.request.user.is_authenticated:
+            return {'comments_html'}
+        return set()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        fragments = self.get_cached_fragments()
+        personal = self.get_personal_fragments()
+        if 'comments_html' in personal:
+            context['comments'], context['next_cursor'] = get_comments_page(
+                self.object.pk, user=self.request.user
+            )
+        elif 'comments_html' not in fragments:
+            context['comments'], context['next_cursor'] = get_comments_page(
+                self.object.pk
+            )
+        context['news_pk'] = self.object.pk
+        for name, template_name in self.fragment_templates.items():
+            render = partial(
+                render_to_string, template_name, context, self.request
+            )
+            if name in personal:
+                context[name] = render()
+            elif name in fragments:
+                context[name] = fragments[name]
+            else:
+                context[name] = cache.get_or_render_fragment(
+                    self.object.pk, self.fragments_version, name, render
+                )
+        return context
+
+
+class NewsDetail(NewsFragmentsMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
+    @conditional_get(
+        etag_func=news_detail_etag,
+        last_modified_func=news_detail_last_modified,
+    )
+    def get(self, request, *args, **kwargs):
+        """
+        Анонимному пользователю страница отдаётся из кэша фрагментов
+        без обращений к базе данных.
+        """
+        fragments = self.get_cached_fragments()
+        if (
+            not self.get_personal_fragments()
+            and fragments.keys() >= self.fragment_templates.keys()
+        ):
+            return self.render_to_response(fragments)
+        with self.reads_primary():
+            return super().get(request, *args, **kwargs)
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +180,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        NewsFragmentsMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,12 +196,18 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if settings.COMMENT_MODERATION_QUEUE:
+            comment.status = Comment.Status.PENDING
+        # Комментарий, счётчик новости и поисковый индекс сохраняются
+        # в одной транзакции.
+        with transaction.atomic(savepoint=False):
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,19 +221,54 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class NewsCommentsPage(generic.TemplateView):
+    """Следующая порция комментариев к новости (кнопка «Загрузить ещё»)."""
+    template_name = 'news/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = get_comments_page(
+            self.kwargs['pk'],
+            cursor=self.request.GET.get('after'),
+            user=self.request.user,
+        )
+        context['news_pk'] = self.kwargs['pk']
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям с постраничным выводом."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        number = page_number(self.request.GET.get('page'))
+        rows, has_next = get_page(
+            search.search(query), number, settings.SEARCH_PAGE_SIZE
+        )
+        context['query'] = query
+        context['results'] = search.load_results(rows)
+        context['page_number'] = number
+        context['has_next'] = has_next
+        return context
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Адрес новости берём из уже загруженного комментария."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.select_related('news').filter(
+            author=self.request.user
+        )
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +276,53 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Комментарий и поисковый индекс меняются в одной транзакции."""
+        with transaction.atomic(savepoint=False):
+            return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        """
+        Комментарий, счётчик новости и поисковый индекс меняются
+        в одной транзакции.
+        """
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        with transaction.atomic(savepoint=False):
+            self.object.delete()
+        return HttpResponseRedirect(success_url)
+
+
+@staff_member_required
+def export(request, kind):
+    """
+    Потоковая выгрузка новостей или комментариев для аналитики.
+
+    Параметры: format (csv или jsonl) и since — момент в ISO 8601,
+    с которого выгружать строки. Строки читаются из базы по мере
+    отправки ответа.
+    """
+    if kind not in SOURCES:
+        raise Http404
+    format = request.GET.get('format', 'jsonl')
+    if format not in FORMATS:
+        raise BadRequest(f'Неизвестный формат выгрузки: {format}.')
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_since(since)
+        except ValueError as error:
+            raise BadRequest(error)
+    response = StreamingHttpResponse(
+        render_lines(kind, format, since or None),
+        content_type=CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{format}"'
+    )
+    return response
@@ -0,0 +1,248 @@
+"""
+Замеры производительности страниц для нагрузочных тестов.
+
+Каждая страница запрашивается REPEATS раз двумя способами: в процессе
+через тестовый клиент Django и по HTTP через локальный WSGI-сервер.
+Для страницы считаются медиана и 99-й процентиль времени ответа, число
+запросов к базе (из заголовка Server-Timing, который ставит
+QueryBudgetMiddleware) и пик памяти Python при обработке запроса
+(tracemalloc).
+
+Тело потокового ответа читает базу уже после того, как заголовки
+отправлены. В процессе такие запросы считаются отдельно, пока тело
+читается; через WSGI-сервер их не видно, и число запросов потоковой
+страницы не записывается и не сравнивается.
+
+Базовая линия в репозитории хранит только число запросов: оно не зависит
+от машины, и лишний запрос — регрессия. Время и память зависят от машины,
+поэтому сравниваются, только если переменная окружения BENCHMARK_TIMINGS
+задаёт файл с замерами, записанными на этой же машине; сверх допусков —
+регрессия. Если файла нет или задана переменная окружения
+BENCHMARK_UPDATE_BASELINE=1, файл записывается заново.
+
+Отчёты нагрузочных тестов пишутся в журнал logger.
+"""
+import json
+import logging
+import math
+import os
+import re
+import time
+import tracemalloc
+from collections import namedtuple
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .middleware import QueryRecorder, recording
+
+logger = logging.getLogger(__name__)
+
+REPEATS = 100
+# Допуски: во сколько раз и на сколько значение может превысить
+# базовую линию. Хвост распределения шумнее медианы.
+LATENCY_TOLERANCE = 1.5
+TAIL_TOLERANCE = 3
+LATENCY_SLACK_MS = 5
+MEMORY_TOLERANCE = 1.25
+MEMORY_SLACK_KIB = 64
+MODES = ('in-process', 'wsgi')
+# Поля Result в базовой линии репозитория и в файле замеров машины.
+BASELINE_FIELDS = ('queries',)
+TIMING_FIELDS = ('p50_ms', 'p99_ms', 'peak_kib')
+QUERIES = re.compile(r'desc="(\d+) queries"')
+UNEXPECTED_STATUS = '{mode} {name}: статус {status} вместо {expected}'
+REGRESSION = '{mode} {name}: {label} {value} при допустимых {limit:.0f}'
+
+# Страница: имя для отчёта, адрес, пользователь (None — аноним) и статус.
+Case = namedtuple('Case', ('name', 'url', 'user', 'status'))
+Result = namedtuple('Result', ('p50_ms', 'p99_ms', 'queries', 'peak_kib'))
+
+
+def percentile(values, fraction):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def timing_queries(timing):
+    """Число запросов к базе из заголовка Server-Timing или None."""
+    queries = QUERIES.search(timing or '')
+    return int(queries.group(1)) if queries else None
+
+
+def client_request(client, url):
+    """Запрос страницы тестовым клиентом: (статус, запросов к базе)."""
+    def request():
+        response = client.get(url)
+        queries = timing_queries(response.get('Server-Timing'))
+        if response.streaming:
+            with recording(QueryRecorder()) as recorder:
+                b''.join(response.streaming_content)
+            queries += recorder.count
+        return response.status_code, queries
+    return request
+
+
+def http_request(server_url, url, cookies):
+    """Запрос страницы у WSGI-сервера server_url с cookies клиента."""
+    server = urlsplit(server_url)
+    headers = {
+        'Cookie': '; '.join(f'{name}={value}' for name, value in cookies)
+    }
+
+    def request():
+        connection = HTTPConnection(server.hostname, server.port)
+        try:
+            connection.request('GET', url, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            # Без Content-Length ответ потоковый, и заголовок не учёл
+            # запросы, выполненные при отдаче тела.
+            if response.getheader('Content-Length') is None:
+                return response.status, None
+            return response.status, timing_queries(
+                response.getheader('Server-Timing')
+            )
+        finally:
+            connection.close()
+    return request
+
+
+def measure(request, repeats=REPEATS):
+    """
+    Замеряет request: возвращает статус ответа и Result.
+
+    Первый запрос прогревает кэши и не учитывается, пик памяти
+    снимается отдельным запросом: tracemalloc замедляет работу.
+    """
+    request()
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        status, queries = request()
+        durations.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return status, Result(
+        p50_ms=round(percentile(durations, 0.5), 2),
+        p99_ms=round(percentile(durations, 0.99), 2),
+        queries=queries,
+        peak_kib=round(peak / 1024),
+    )
+
+
+def run_cases(cases, make_client, server_url):
+    """
+    Замеряет страницы cases в процессе и через WSGI-сервер server_url.
+
+    make_client(user) возвращает тестовый клиент, вошедший как user;
+    его cookies передаются и в HTTP-запросы. Возвращает результаты
+    по режимам и ошибки статусов ответа.
+    """
+    results, errors = {mode: {} for mode in MODES}, []
+    for case in cases:
+        client = make_client(case.user)
+        cookies = [
+            (name, morsel.value) for name, morsel in client.cookies.items()
+        ]
+        for mode, request in (
+            ('in-process', client_request(client, case.url)),
+            ('wsgi', http_request(server_url, case.url, cookies)),
+        ):
+            status, results[mode][case.name] = measure(request)
+            if status != case.status:
+                errors.append(UNEXPECTED_STATUS.format(
+                    mode=mode, name=case.name, status=status,
+                    expected=case.status,
+                ))
+    return results, errors
+
+
+def limits(expected):
+    """Поля базовой линии expected: подпись, имя поля и допустимое значение."""
+    for label, field, limit in (
+        ('запросов', 'queries', lambda value: value),
+        ('p50, мс', 'p50_ms',
+         lambda value: value * LATENCY_TOLERANCE + LATENCY_SLACK_MS),
+        ('p99, мс', 'p99_ms',
+         lambda value: value * TAIL_TOLERANCE + LATENCY_SLACK_MS),
+        ('пик памяти, КиБ', 'peak_kib',
+         lambda value: value * MEMORY_TOLERANCE + MEMORY_SLACK_KIB),
+    ):
+        if expected.get(field) is not None:
+            yield label, field, limit(expected[field])
+
+
+def compare(results, baseline):
+    """
+    Регрессии results относительно baseline. Сравниваются только поля,
+    записанные в baseline; неизвестное число запросов (None)
+    не сравнивается.
+    """
+    regressions = []
+    for mode, cases in results.items():
+        for name, result in cases.items():
+            expected = baseline.get(mode, {}).get(name)
+            if expected is None:
+                continue
+            for label, field, limit in limits(expected):
+                value = getattr(result, field)
+                if value is not None and value > limit:
+                    regressions.append(REGRESSION.format(
+                        mode=mode, name=name, label=label, value=value,
+                        limit=limit,
+                    ))
+    return regressions
+
+
+def compare_file(results, path, fields):
+    """
+    Сравнивает поля fields результатов с файлом path; без файла или
+    с BENCHMARK_UPDATE_BASELINE=1 записывает их в файл.
+    """
+    if os.environ.get('BENCHMARK_UPDATE_BASELINE') or not path.exists():
+        path.write_text(json.dumps(
+            {
+                mode: {
+                    name: {field: getattr(result, field) for field in fields}
+                    for name, result in sorted(cases.items())
+                }
+                for mode, cases in results.items()
+            },
+            ensure_ascii=False,
+            indent=2,
+        ) + '\n', encoding='utf-8')
+        return []
+    return compare(results, json.loads(path.read_text(encoding='utf-8')))
+
+
+def check_baseline(results, path):
+    """
+    Сравнивает число запросов results с базовой линией из файла path,
+    а время и память — с файлом BENCHMARK_TIMINGS, если он задан;
+    возвращает регрессии.
+    """
+    regressions = compare_file(results, path, BASELINE_FIELDS)
+    timings = os.environ.get('BENCHMARK_TIMINGS')
+    if timings:
+        regressions += compare_file(results, Path(timings), TIMING_FIELDS)
+    return regressions
+
+
+def format_results(results):
+    """Таблица результатов для вывода в консоль."""
+    lines = []
+    for mode, cases in results.items():
+        for name, result in cases.items():
+            lines.append(
+                f'{mode:<10} {name:<16} p50 {result.p50_ms:>7.2f} мс, '
+                f'p99 {result.p99_ms:>7.2f} мс, '
+                f'запросов {result.queries}, '
+                f'пик памяти {result.peak_kib} КиБ'
+            )
+    return '\n'.join(lines)
@@ -0,0 +1,128 @@
+"""
+Быстрое наполнение базы тестовыми данными.
+
+Фабрики приложений строят графы из сотен тысяч строк за доли секунды:
+строки таблицы вставляются одним executemany, без экземпляров моделей,
+save() и сигналов, а даты пишутся сразу, без второго save() в обход
+auto_now_add. Первичные ключи назначаются подряд от текущего максимума,
+поэтому фабрика возвращает queryset ровно своих строк. Значения полей
+детерминированы: константа, функция номера строки или ряд Series,
+даты по умолчанию отсчитываются от START.
+
+Сигналы не отправляются: счётчики, версии кэша и другие следствия
+сохранения выставляют фабрики приложений. Ключи назначаются без
+блокировки, так что фабрики предназначены только для тестов и замеров.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+from itertools import accumulate, cycle, islice, repeat
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.db.models import Max
+
+START = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+USERNAME = 'Пользователь'
+# Значения полей этих типов передаются в базу без подготовки полем.
+PLAIN_FIELDS = frozenset((
+    'BigIntegerField', 'BooleanField', 'CharField', 'FloatField',
+    'ForeignKey', 'IntegerField', 'PositiveBigIntegerField',
+    'PositiveIntegerField', 'PositiveSmallIntegerField', 'SlugField',
+    'SmallIntegerField', 'TextField',
+))
+
+
+class Series(namedtuple('Series', ('start', 'step', 'period'))):
+    """
+    Ряд дат: i-я строка получает start + (i % period) * step.
+
+    Без period ряд не повторяется. Начало ряда готовится полем один раз,
+    дальше даты складываются уже в представлении базы: подготовка
+    каждого значения полем заняла бы больше времени, чем сама вставка.
+    """
+
+    def __new__(cls, start, step, period=None):
+        return super().__new__(cls, start, step, period)
+
+
+def next_pk(model, using):
+    """Первичный ключ, с которого фабрика начнёт нумерацию строк."""
+    last = model._base_manager.using(using).aggregate(last=Max('pk'))['last']
+    return (last or 0) + 1
+
+
+def column_values(field, value, count, connection):
+    """Значения столбца для count строк в представлении базы."""
+    rows = range(count)
+    if isinstance(value, Series):
+        start = type(value.start).fromisoformat(
+            field.get_db_prep_save(value.start, connection)
+        )
+        dates = map(str, accumulate(
+            repeat(value.step, count - 1), initial=start
+        ))
+        if value.period is None:
+            return dates
+        return islice(cycle(list(islice(dates, value.period))), count)
+    if not callable(value):
+        return repeat(field.get_db_prep_save(value, connection), count)
+    if field.get_internal_type() in PLAIN_FIELDS:
+        return map(value, rows)
+    return (field.get_db_prep_save(value(index), connection) for index in rows)
+
+
+def insert_rows(model, count, first=None, **values):
+    """
+    Вставляет count строк model; возвращает queryset новых строк.
+
+    Ключ values — attname поля (author_id для внешнего ключа), значение —
+    константа, функция номера строки от 0 или Series. Незаданные поля получают
+    значение по умолчанию, поля auto_now и auto_now_add — START.
+    Ключи нумеруются с first, по умолчанию — со следующего за последним.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    meta = model._meta
+    if first is None:
+        first = next_pk(model, using)
+    columns = [meta.pk.column]
+    column_values_list = [range(first, first + count)]
+    for field in meta.concrete_fields:
+        if field.primary_key:
+            continue
+        if field.attname in values:
+            value = values[field.attname]
+        elif getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False
+        ):
+            value = START
+        else:
+            value = field.get_default()
+        columns.append(field.column)
+        column_values_list.append(
+            column_values(field, value, count, connection)
+        )
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(meta.db_table),
+        ', '.join(map(quote, columns)),
+        ', '.join(['%s'] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, zip(*column_values_list))
+    return model._default_manager.using(using).filter(
+        pk__gte=first, pk__lt=first + count
+    )
+
+
+def make_users(count, prefix=USERNAME, **values):
+    """
+    Создаёт count пользователей «{prefix} <ключ>»: имена
+    не пересекаются с другими пользователями фабрики.
+    """
+    model = get_user_model()
+    first = next_pk(model, router.db_for_write(model))
+    return insert_rows(model, count, first, **{
+        'username': lambda index: f'{prefix} {first + index}',
+        **values,
+    })
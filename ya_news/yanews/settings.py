@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.QueryBudgetMiddleware',
+    'yanews.routers.PrimaryAfterWriteMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,14 +53,119 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
+DB_REPLICA_NAME = os.getenv('DB_REPLICA_NAME')
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Реплика основной базы только для чтения, путь к ней задаётся
+    # переменной окружения DB_REPLICA_NAME. В тестах это отдельная пустая
+    # база: данные в неё копируются явно, как это сделала бы репликация.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_REPLICA_NAME or BASE_DIR / 'db.sqlite3',
+    },
 }
 
+# Режим «SQLite в продакшене» (yanews.sqlite_backend): WAL и настроенные
+# PRAGMA, BEGIN IMMEDIATE для записи и постоянные соединения
+# с проверкой при первом обращении к базе в запросе. Включается
+# переменной окружения SQLITE_PRODUCTION=1.
+if os.getenv('SQLITE_PRODUCTION'):
+    for database in DATABASES.values():
+        database['ENGINE'] = 'yanews.sqlite_backend'
+        database['CONN_MAX_AGE'] = 600
+
+# Чтение идёт с реплик из DATABASE_REPLICAS, запись — в default,
+# см. yanews.routers. Без DB_REPLICA_NAME или если он указывает на файл
+# основной базы, реплик нет и всё читается из default.
+DATABASE_ROUTERS = ['yanews.routers.ReplicaRouter']
+DATABASE_REPLICAS = (
+    ['replica']
+    if DB_REPLICA_NAME
+    and Path(DB_REPLICA_NAME).resolve() != DATABASES['default']['NAME']
+    else []
+)
+# Сколько секунд после изменяющего запроса пользователь читает
+# из основной базы: должно покрывать отставание реплики.
+REPLICA_PIN_SECONDS = 5
+
+# Бэкенд кэша выбирается переменной окружения CACHE_BACKEND.
+# memcached-standin хранит данные в памяти процесса, но проверяет ключи
+# и размер значений как memcached: подходит для тестов и разработки.
+# locmem и memcached-standin видны только своему процессу, а через кэш
+# расходятся сбросы версий и ETag: при нескольких рабочих процессах
+# нужен file или memcached (manage.py check предупреждает, yanews.W001).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+# Бэкенды, общие для всех рабочих процессов сервера.
+SHARED_CACHE_BACKENDS = ('file', 'memcached')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'yanews.cache.CountingLocMemCache',
+        'LOCATION': 'yanews',
+    },
+    'file': {
+        'BACKEND': 'yanews.cache.CountingFileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / '.cache'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+    'memcached-standin': {
+        'BACKEND': 'yanews.cache.MemcachedStandInCache',
+        'LOCATION': 'yanews-memcached',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'yanews',
+    },
+}
+
+# Пространства имён приложений: увеличение version сбрасывает все ключи.
+CACHE_NAMESPACES = {
+    'news': {'version': 1, 'timeout': 60 * 60},
+    'auth': {'version': 1, 'timeout': 15 * 60},
+}
+
+# Сколько секунд ждать, пока другой процесс пересчитывает значение.
+CACHE_LOCK_TIMEOUT = 10
+
+
+# Движок сессий выбирается переменной окружения SESSION_BACKEND.
+# cached-db читает сессию из кэша, а сохраняет и в кэш, и в базу;
+# signed-cookies хранит сессию в подписанной cookie и не обращается
+# к базе, но такую сессию нельзя завершить на сервере, кроме как
+# сменой пароля или SECRET_KEY.
+# Выход и смена пароля сбрасывают сессию и пользователя только в кэше
+# своего процесса, поэтому без общего кэша по умолчанию сессии и
+# пользователи читаются из базы.
+SESSION_BACKEND = os.getenv(
+    'SESSION_BACKEND',
+    'cached-db' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else 'db',
+)
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached-db': 'django.contrib.sessions.backends.cached_db',
+    'signed-cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+# При общем кэше пользователь сессии читается из кэша, см. yanews.sessions.
+AUTHENTICATION_BACKENDS = [
+    'yanews.sessions.CachedModelBackend'
+    if CACHE_BACKEND in SHARED_CACHE_BACKENDS
+    else 'django.contrib.auth.backends.ModelBackend'
+]
+
 
 AUTH_PASSWORD_VALIDATORS = []  # type: ignore
 
@@ -80,3 +188,69 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PAGE_SIZE = 20
+
+SEARCH_PAGE_SIZE = 20
+# Сколько секунд кэшируется частота слова в поисковом индексе.
+SEARCH_FREQUENCY_TIMEOUT = 10 * 60
+
+# Бюджеты запросов к БД по имени маршрута, учитываются
+# yanews.middleware.QueryBudgetMiddleware. Включают чтение сессии
+# и пользователя для авторизованных запросов. Главная страница
+# дополнительно читает свою версию для ETag. Запись комментария идёт
+# в транзакции (BEGIN) и обновляет поисковый индекс, а создание
+# и удаление — ещё и счётчик новости.
+QUERY_BUDGETS = {
+    'news:home': 4,
+    'news:detail': 7,
+    'news:comments': 3,
+    'news:edit': 7,
+    'news:delete': 7,
+    'news:search': 7,
+}
+
+# С какого числа повторов одинаковый запрос считается признаком N+1.
+QUERY_DUPLICATE_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanews.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yanews.benchmarks': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Проверка комментариев на запрещённые слова. Слово из словаря
+# засчитывается и внутри другого слова, как в прежней проверке подстрокой;
+# MODERATION_WORD_BOUNDARY = True оставляет только целые слова. Латинские
+# буквы-двойники приводятся к кириллице.
+MODERATION_WORD_BOUNDARY = False
+MODERATION_HOMOGLYPHS = True
+
+# Как часто (в секундах) процесс сверяет версию словаря модерации.
+MODERATION_REFRESH_INTERVAL = 5
+
+# Фоновая модерация: новые комментарии ждут проверки обработчиками
+# (python manage.py moderate_comments) и публикуются после неё.
+# Обработчики — отдельные процессы, поэтому нужен общий кэш.
+COMMENT_MODERATION_QUEUE = False
+COMMENT_MODERATION_CHECKS = (
+    'news.pipeline.check_bad_words',
+    'news.pipeline.check_links',
+    'news.pipeline.check_duplicates',
+)
+COMMENT_MODERATION_POLL_INTERVAL = 1
+COMMENT_MAX_LINKS = 2
@@ -0,0 +1,86 @@
+"""
+SQLite для небольших продакшен-установок.
+
+Бэкенд расширяет django.db.backends.sqlite3:
+
+* при подключении выполняет PRAGMA из PRAGMAS (их можно переопределить
+  в OPTIONS['pragmas']): журнал WAL, чтобы читатели не ждали писателя,
+  synchronous=NORMAL (в режиме WAL база не повреждается при сбое,
+  теряются лишь последние транзакции), кэш страниц, отображение файла
+  в память и ожидание занятой базы вместо немедленной ошибки;
+* начинает транзакции командой BEGIN IMMEDIATE: писатель сразу берёт
+  блокировку записи и ждёт её до busy_timeout. С обычным BEGIN две
+  транзакции, начавшие с чтения, не могут обе перейти к записи,
+  и одна из них сразу получает «database is locked». Так записи
+  выстраиваются в очередь на уровне базы;
+* проверяет постоянное соединение (CONN_MAX_AGE) запросом SELECT 1
+  и закрывает неработающее. Проверка выполняется один раз за запрос,
+  при первом обращении к базе: соединения, которые запрос не трогает,
+  и только что открытые соединения не проверяются.
+"""
+import sqlite3
+
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    # Отрицательное значение — размер в КиБ: 64 МиБ.
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Проверено ли соединение в текущем запросе.
+    health_check_done = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, {
+            **PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {}),
+        })
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
+
+    def connect(self):
+        # Новое соединение не проверяется, в том числе из set_autocommit
+        # внутри connect().
+        self.health_check_done = True
+        super().connect()
+
+    def _cursor(self, name=None):
+        if self.connection is not None and not self.health_check_done:
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+        return super()._cursor(name)
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except sqlite3.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        """
+        Вызывается в начале и в конце запроса: следующее обращение
+        к базе сначала проверит соединение.
+        """
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -4,9 +4,12 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from yanews.cache import stats_view
+
 urlpatterns = [
     path('', include('news.urls')),
     path('admin/', admin.site.urls),
+    path('cache-stats/', stats_view, name='cache-stats'),
 ]
 
 auth_urls = (
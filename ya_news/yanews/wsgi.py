@@ -1,7 +1,20 @@
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
 application = get_wsgi_application()
+
+# Словарь модерации собирается до первого запроса, чтобы проверка
+# комментария не читала слова из базы. Без миграций автомат соберёт
+# первая проверка.
+from news.forms import bad_words  # noqa: E402
+
+try:
+    bad_words.matcher()
+except DatabaseError:
+    pass
+finally:
+    connections.close_all()
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from yanote import sessions  # noqa: F401
+
+        from . import signals  # noqa: F401
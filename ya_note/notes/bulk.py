@@ -0,0 +1,200 @@
+"""
+Массовый импорт и экспорт заметок.
+
+Импорт читает записи JSON Lines или CSV потоком и проверяет каждую
+правилами NoteForm. Записи сохраняются пачками: slug всей пачки
+подбираются несколькими запросами (notes.slugs.allocate_slugs), заметки
+вставляются одним bulk_create в транзакции. bulk_create не отправляет
+сигналы, поэтому версии списков заметок авторов меняются явно,
+а полнотекстовый индекс обновляют триггеры FTS5. Экспорт читает заметки
+через iterator() и сразу пишет их в поток, память не растёт с числом
+заметок.
+"""
+import csv
+import json
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .forms import WARNING, NoteForm
+from .models import Note, NoteListVersion
+from .slugs import SlugTaken, allocate_slugs
+
+FORMATS = ('jsonl', 'csv')
+FIELDS = ('author', 'title', 'text', 'slug')
+EXPORT_CHUNK_SIZE = 2000
+UNKNOWN_AUTHOR = 'нет пользователя «{username}»'
+NO_AUTHOR = 'не указан автор'
+INVALID_JSON = 'некорректный JSON: {error}'
+NOT_OBJECT = 'запись должна быть объектом JSON, а не {type}'
+
+ImportResult = namedtuple('ImportResult', ('created', 'errors'))
+
+
+def read_records(stream, format):
+    """
+    Пары (номер строки, поля записи или текст ошибки разбора).
+
+    Поля записи — всегда словарь: строка или число в строке JSON Lines
+    тоже считается ошибкой разбора.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            yield line_number, INVALID_JSON.format(error=error)
+            continue
+        if not isinstance(record, dict):
+            record = NOT_OBJECT.format(type=type(record).__name__)
+        yield line_number, record
+
+
+def form_errors(form):
+    return '; '.join(
+        f'{field}: {message}'
+        for field, messages in form.errors.items()
+        for message in messages
+    )
+
+
+def build_notes(records, author):
+    """
+    Проверяет пачку записей и строит несохранённые заметки.
+
+    Авторы пачки читаются одним запросом. Возвращает заметки с номерами
+    строк и ошибки (номер строки, текст).
+    """
+    usernames = {
+        record['author'] for _, record in records
+        if isinstance(record, dict) and record.get('author')
+    }
+    users = get_user_model().objects.in_bulk(
+        usernames, field_name='username'
+    )
+    notes, errors = [], []
+    for line_number, record in records:
+        if isinstance(record, str):
+            errors.append((line_number, record))
+            continue
+        username = record.get('author')
+        user = users.get(username) if username else author
+        if user is None:
+            errors.append((line_number, UNKNOWN_AUTHOR.format(
+                username=username
+            ) if username else NO_AUTHOR))
+            continue
+        form = NoteForm(data=record)
+        if not form.is_valid():
+            errors.append((line_number, form_errors(form)))
+            continue
+        note = form.save(commit=False)
+        note.author = user
+        notes.append((line_number, note))
+    return notes, errors
+
+
+def save_one_by_one(notes, generated):
+    """
+    Запасной путь, если параллельная запись заняла slug пачки между
+    подбором и вставкой: заметки сохраняются по одной через Note.save.
+    """
+    created, errors = 0, []
+    for line_number, note in notes:
+        if id(note) in generated:
+            note.slug = ''
+        try:
+            note.save()
+        except SlugTaken as error:
+            errors.append((line_number, error.slug + WARNING))
+        else:
+            created += 1
+    return created, errors
+
+
+def save_batch(notes, known):
+    """
+    Сохраняет пачку заметок; возвращает число созданных и ошибки.
+
+    known — занятые номера slug, общие для пачек импорта, см.
+    notes.slugs.allocate_slugs.
+    """
+    generated = {id(note) for _, note in notes if not note.slug}
+    conflicts = {
+        id(note)
+        for note in allocate_slugs([note for _, note in notes], known)
+    }
+    errors = [
+        (line_number, note.slug + WARNING)
+        for line_number, note in notes if id(note) in conflicts
+    ]
+    notes = [
+        (line_number, note) for line_number, note in notes
+        if id(note) not in conflicts
+    ]
+    try:
+        with transaction.atomic():
+            Note.objects.bulk_create(note for _, note in notes)
+            NoteListVersion.bump(note.author_id for _, note in notes)
+    except IntegrityError:
+        # Запомненные номера могли устареть.
+        known.clear()
+        created, retry_errors = save_one_by_one(notes, generated)
+        return created, errors + retry_errors
+    return len(notes), errors
+
+
+def import_notes(stream, format='jsonl', author=None, batch_size=1000):
+    """
+    Импортирует заметки из потока, пачками по batch_size записей.
+
+    Поле author записи — имя пользователя; без него заметка достаётся
+    author. Ошибочные записи пропускаются и попадают в отчёт.
+    """
+    records = read_records(stream, format)
+    created, errors = 0, []
+    known = {}
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return ImportResult(created, errors)
+        notes, batch_errors = build_notes(batch, author)
+        batch_created, save_errors = save_batch(notes, known)
+        created += batch_created
+        errors += sorted(batch_errors + save_errors)
+
+
+def export_notes(stream, format='jsonl', author=None):
+    """
+    Пишет заметки в поток в порядке создания; возвращает их число.
+
+    Строки читаются из базы частями по EXPORT_CHUNK_SIZE.
+    """
+    notes = Note.objects.order_by('pk').values_list(
+        'author__username', 'title', 'text', 'slug'
+    )
+    if author is not None:
+        notes = notes.filter(author=author)
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(
+                json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False)
+                + '\n'
+            )
+    count = 0
+    for row in notes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        write(row)
+        count += 1
+    return count
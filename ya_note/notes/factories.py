@@ -0,0 +1,42 @@
+"""
+Фабрики заметок для тестов и замеров.
+
+Строки вставляются пачкой через yanote.factories.insert_rows.
+Полнотекстовый индекс обновляют триггеры FTS5, версии списков заметок
+авторов меняются сразу.
+"""
+from datetime import timedelta
+
+from django.db import router
+
+from yanote.factories import START, Series, insert_rows, next_pk
+
+from .models import Note, NoteListVersion
+
+NOTE_TITLE = 'Заметка'
+NOTE_TEXT = 'Текст'
+SLUG_PREFIX = 'note'
+
+
+def make_notes(
+    count, authors, start=START, step=timedelta(minutes=1), **values,
+):
+    """
+    Создаёт count заметок «Заметка 0», «Заметка 1» и так далее.
+
+    Авторы берутся из authors по кругу, slug — «note-<ключ>», поэтому
+    не пересекается с другими заметками фабрики.
+    i-я заметка изменена в start + i * step.
+    """
+    author_pks = [author.pk for author in authors]
+    first = next_pk(Note, router.db_for_write(Note))
+    notes = insert_rows(Note, count, first, **{
+        'author_id': lambda index: author_pks[index % len(author_pks)],
+        'title': lambda index: f'{NOTE_TITLE} {index}',
+        'text': NOTE_TEXT,
+        'slug': lambda index: f'{SLUG_PREFIX}-{first + index}',
+        'updated': Series(start, step),
+        **values,
+    })
+    NoteListVersion.bump(author_pks)
+    return notes
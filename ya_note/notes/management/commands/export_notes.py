@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import FORMATS, export_notes
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--author', help='Выгрузить только заметки этого пользователя.',
+        )
+
+    def handle(self, *args, path, format, author, **options):
+        if author is not None:
+            try:
+                author = get_user_model().objects.get(username=author)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'Нет пользователя «{author}».')
+        format = format or ('csv' if path.endswith('.csv') else 'jsonl')
+        if path == '-':
+            count = export_notes(self.stdout, format, author)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = export_notes(stream, format, author)
+        self.stderr.write(f'Выгружено заметок: {count}')
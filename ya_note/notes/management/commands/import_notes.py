@@ -0,0 +1,46 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import FORMATS, import_notes
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки из файла JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с заметками; «-» — стандартный ввод.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Имя автора для записей без поля author.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько заметок вставлять за одну транзакцию.',
+        )
+
+    def handle(self, *args, path, format, author, batch_size, **options):
+        if author is not None:
+            try:
+                author = get_user_model().objects.get(username=author)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'Нет пользователя «{author}».')
+        format = format or ('csv' if path.endswith('.csv') else 'jsonl')
+        if path == '-':
+            result = import_notes(sys.stdin, format, author, batch_size)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                result = import_notes(stream, format, author, batch_size)
+        for line_number, error in result.errors:
+            self.stderr.write(f'Строка {line_number}: {error}')
+        self.stdout.write(
+            f'Создано заметок: {result.created}, '
+            f'ошибок: {len(result.errors)}'
+        )
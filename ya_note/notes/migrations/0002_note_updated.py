@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(
+                fields=['author', 'updated'], name='note_author_updated_idx'
+            ),
+        ),
+    ]
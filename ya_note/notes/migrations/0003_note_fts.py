@@ -0,0 +1,66 @@
+import sqlite3
+
+from django.db import migrations
+
+# SQL заморожен в миграции: дальнейшие изменения индекса в notes.search
+# должны приходить новыми миграциями.
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE notes_note_fts USING fts5("
+    "title, text, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61')",
+    "CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(rowid, title, text) "
+    "VALUES (new.id, new.title, new.text); END",
+    "CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) "
+    "VALUES ('delete', old.id, old.title, old.text); END",
+    "CREATE TRIGGER notes_note_fts_update AFTER UPDATE OF title, text "
+    "ON notes_note BEGIN "
+    "INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) "
+    "VALUES ('delete', old.id, old.title, old.text); "
+    "INSERT INTO notes_note_fts(rowid, title, text) "
+    "VALUES (new.id, new.title, new.text); END",
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+DROP_FTS = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_insert',
+    'DROP TRIGGER IF EXISTS notes_note_fts_delete',
+    'DROP TRIGGER IF EXISTS notes_note_fts_update',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE fts5_check USING fts5(text)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def create_index(apps, schema_editor):
+    if fts5_available(schema_editor):
+        for sql in DROP_FTS + CREATE_FTS:
+            schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_FTS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
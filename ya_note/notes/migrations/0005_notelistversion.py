@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-18 23:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0004_note_fts_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteListVersion',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+            ],
+        ),
+    ]
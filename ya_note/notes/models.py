@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.db import models
 
-from pytils.translit import slugify
+from .slugs import save_with_unique_slug, slugify_title
 
 
 class Note(models.Model):
@@ -27,12 +27,65 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'updated'),
+                name='note_author_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
+        """
+        Пустой slug строится по заголовку, при совпадении к нему
+        добавляется номер: «zametka-2», «zametka-3» и так далее.
+        """
+        base = None
         if not self.slug:
             max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+            base = slugify_title(self.title, max_slug_length)
+        save_with_unique_slug(
+            self, lambda: super(Note, self).save(*args, **kwargs), base
+        )
+
+
+class NoteListVersion(models.Model):
+    """
+    Версия списка заметок автора для ETag.
+
+    Сохранение и удаление заметки увеличивают её одним UPDATE, поэтому
+    проверка списка читает одну строку по первичному ключу, сколько бы
+    заметок ни было у автора.
+    """
+
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField('Версия', default=0)
+
+    @classmethod
+    def bump(cls, author_pks):
+        """Увеличивает версии авторов; строка создаётся при первой заметке."""
+        author_pks = set(author_pks)
+        updated = cls.objects.filter(author_id__in=author_pks).update(
+            version=models.F('version') + 1
+        )
+        if updated < len(author_pks):
+            cls.objects.bulk_create(
+                [cls(author_id=pk, version=1) for pk in author_pks],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def get(cls, author_pk):
+        """Версия списка автора, 0 — если он ещё не менял заметки."""
+        return cls.objects.filter(author_id=author_pk).values_list(
+            'version', flat=True
+        ).first() or 0
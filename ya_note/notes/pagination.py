@@ -0,0 +1,32 @@
+"""Курсорная (keyset) пагинация списка заметок."""
+from django.conf import settings
+from django.core.exceptions import BadRequest
+
+INVALID_CURSOR = 'Некорректный курсор списка заметок.'
+
+
+def decode_cursor(cursor):
+    """Курсор — номер последней заметки предыдущей страницы."""
+    try:
+        return int(cursor)
+    except ValueError:
+        raise BadRequest(INVALID_CURSOR)
+
+
+def get_notes_page(notes, cursor=None, page_size=None):
+    """
+    Возвращает страницу заметок и курсор следующей страницы.
+
+    Заметки упорядочены от новых к старым по номеру. Следующая страница
+    начинается строго после курсора, поэтому стоимость запроса зависит
+    от размера страницы, а не от числа заметок пользователя.
+    """
+    page_size = page_size or settings.NOTES_PAGE_SIZE
+    if cursor:
+        notes = notes.filter(pk__lt=decode_cursor(cursor))
+    notes = list(notes.order_by('-pk')[:page_size + 1])
+    next_cursor = None
+    if len(notes) > page_size:
+        notes = notes[:page_size]
+        next_cursor = notes[-1].pk
+    return notes, next_cursor
@@ -0,0 +1,81 @@
+"""
+Поиск по заголовку и тексту заметок.
+
+На SQLite с поддержкой FTS5 поиск идёт по полнотекстовому индексу
+notes_note_fts. Это таблица с внешним содержимым: тексты хранятся только
+в notes_note, а индекс поддерживают триггеры; таблицу и триггеры
+создают миграции notes 0003 и 0004. Вместе с заголовком
+и текстом индексируется автор, поэтому поиск по заметкам пользователя
+обходит только его совпадения и, с ORDER BY rowid и LIMIT, останавливается
+после одной страницы. На других базах или без FTS5 используется поиск
+подстроки через icontains.
+"""
+import sqlite3
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'notes_note_fts'
+
+
+@lru_cache(maxsize=None)
+def fts5_available():
+    """Поддерживает ли FTS5 библиотека SQLite, с которой собран Python."""
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE fts5_check USING fts5(text)'
+        )
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def uses_fts(connection):
+    return (
+        settings.NOTES_FULL_TEXT_SEARCH
+        and connection.vendor == 'sqlite'
+        and fts5_available()
+    )
+
+
+def fts_query(query, author_pk=None):
+    """
+    Переводит строку поиска в запрос FTS5.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в тексте
+    пользователя не имели силы, и ищется как префикс в заголовке или
+    тексте; все слова должны встретиться в заметке автора author_pk.
+    """
+    words = [
+        '{{title text}} : "{}"*'.format(word.replace('"', '""'))
+        for word in query.split()
+    ]
+    if author_pk is not None:
+        words.insert(0, f'author_id : "{int(author_pk)}"')
+    return ' AND '.join(words)
+
+
+def search_notes(notes, query, author_pk=None, before=None, limit=None):
+    """
+    Оставляет в notes заметки, в заголовке или тексте которых есть query.
+
+    Для полнотекстового индекса можно сузить поиск до заметок автора
+    author_pk с номерами меньше before и ограничить его limit первыми
+    с конца совпадениями: так стоимость зависит от размера страницы,
+    а не от числа совпадений у всех пользователей.
+    """
+    if uses_fts(connections[notes.db]):
+        sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        params = [fts_query(query, author_pk)]
+        if before is not None:
+            sql += ' AND rowid < %s'
+            params.append(before)
+        sql += ' ORDER BY rowid DESC'
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        return notes.filter(pk__in=RawSQL(sql, params))
+    return notes.filter(Q(title__icontains=query) | Q(text__icontains=query))
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note, NoteListVersion
+
+
+@receiver((post_save, post_delete), sender=Note)
+def note_changed(sender, instance, **kwargs):
+    """
+    Любое изменение заметки меняет версию списка заметок автора в той же
+    транзакции, что и сама заметка.
+    """
+    NoteListVersion.bump([instance.author_id])
@@ -0,0 +1,267 @@
+"""
+Выбор уникального slug заметки без предварительной проверки.
+
+Заметка сразу сохраняется с желаемым slug, а уникальность проверяет
+ограничение базы данных. Если slug, построенный по заголовку, уже занят,
+одним запросом по индексу slug читаются занятые варианты с номерами
+(«zametka-2», «zametka-3», ...), выбирается следующий свободный
+и вставка повторяется. Параллельный писатель может занять тот же
+вариант между чтением и вставкой — тогда попытка повторяется ещё раз.
+Slug, указанный пользователем, не меняется: при конфликте поднимается
+SlugTaken.
+
+Транслитерация заголовков запоминается в ограниченном LRU-кэше процесса:
+одинаковые заголовки («Список покупок», «Без названия») встречаются
+часто, особенно при массовом импорте. Попадания и промахи учитываются
+в yanote.cache.stats в группе «slugify».
+"""
+import re
+import threading
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from pytils.translit import slugify
+
+from yanote.cache import stats
+
+SLUG_ATTEMPTS = 10
+SLUGIFY_CACHE_SIZE = 10_000
+# Сколько основ проверять одним запросом при массовом подборе slug.
+SLUG_QUERY_SIZE = 300
+NUMBER_SUFFIX = re.compile(r'-\d+$')
+# Дефис и номер варианта не длиннее десяти цифр.
+NUMBER_MAX_LENGTH = 11
+STATS_GROUP = 'slugify'
+
+_slugify_lock = threading.Lock()
+
+
+class SlugTaken(IntegrityError):
+    """Slug, указанный пользователем, занят другой заметкой."""
+
+    def __init__(self, slug):
+        super().__init__(slug)
+        self.slug = slug
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def transliterate(title):
+    return slugify(title)
+
+
+def slugify_many(titles, max_length):
+    """
+    Slug для каждого заголовка, не длиннее max_length.
+
+    Кэш читается под блокировкой, чтобы попадания пачки считались
+    точно и при параллельных запросах.
+    """
+    slugs = []
+    with _slugify_lock:
+        before = transliterate.cache_info()
+        for title in titles:
+            slugs.append(transliterate(title)[:max_length])
+        after = transliterate.cache_info()
+    stats.incr(STATS_GROUP, 'hits', after.hits - before.hits)
+    stats.incr(STATS_GROUP, 'misses', after.misses - before.misses)
+    return slugs
+
+
+def slugify_title(title, max_length):
+    """Slug по одному заголовку через тот же кэш."""
+    return slugify_many((title,), max_length)[0]
+
+
+def numbered_slug(base, number, max_length):
+    """Вариант slug с номером; основа укорачивается, чтобы номер влез."""
+    if number == 1:
+        return base
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def variant_range(base, max_length):
+    """
+    Границы диапазона slug, в котором лежат все варианты основы.
+
+    Обычно это «base» … «base-:». Длинная основа укорачивается, чтобы
+    номер влез, поэтому её варианты ищутся по префиксу без последних
+    NUMBER_MAX_LENGTH символов.
+    """
+    if len(base) + NUMBER_MAX_LENGTH <= max_length:
+        return base, f'{base}-:'
+    prefix = base[:max_length - NUMBER_MAX_LENGTH]
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def taken_slugs(queryset, bases, slugs=()):
+    """
+    Занятые slug из slugs, основы bases и их варианты с номером.
+
+    Для каждой основы диапазон variant_range выбирает по индексу slug,
+    которые с неё начинаются; лишние отбрасывает slug_variants. Все
+    основы проверяются одним запросом. Условие собирается строкой:
+    объединение сотен Q через | строится Django за квадратичное время.
+    """
+    bases = set(bases)
+    slugs = set(slugs)
+    max_length = queryset.model._meta.get_field('slug').max_length
+    conditions = ['slug = %s'] * len(slugs)
+    params = list(slugs)
+    for base in bases:
+        conditions.append('(slug >= %s AND slug < %s)')
+        params += variant_range(base, max_length)
+    if not conditions:
+        return set()
+    found = queryset.filter(RawSQL(
+        ' OR '.join(conditions), params, output_field=BooleanField()
+    )).values_list('slug', flat=True)
+    return {
+        slug for slug in found
+        if slug in slugs or slug_variants(slug, bases, max_length)
+    }
+
+
+class TakenNumbers:
+    """Занятые номера вариантов одной основы slug."""
+
+    def __init__(self, numbers=()):
+        self.numbers = set(numbers)
+        self.lowest_free = 1
+
+    def take(self):
+        """Занимает наименьший свободный номер."""
+        while self.lowest_free in self.numbers:
+            self.lowest_free += 1
+        self.numbers.add(self.lowest_free)
+        return self.lowest_free
+
+
+def slug_variants(slug, bases, max_length):
+    """
+    Пары (основа из bases, номер), вариантом которых является slug.
+
+    Укороченный вариант длинной основы «prefix-2» совпадает с вариантами
+    всех основ с тем же префиксом, поэтому пар может быть несколько.
+    """
+    variants = [(slug, 1)] if slug in bases else []
+    match = NUMBER_SUFFIX.search(slug)
+    if match is None:
+        return variants
+    stripped, number = slug[:match.start()], int(match.group()[1:])
+    if len(slug) < max_length:
+        candidates = (stripped,) if stripped in bases else ()
+    else:
+        candidates = [base for base in bases if base.startswith(stripped)]
+    variants += [
+        (base, number) for base in candidates
+        if numbered_slug(base, number, max_length) == slug
+    ]
+    return variants
+
+
+def mark_taken(slug, known, max_length):
+    """Отмечает slug занятым у всех основ из known, чей он вариант."""
+    for base, number in slug_variants(slug, known, max_length):
+        known[base].numbers.add(number)
+
+
+def read_taken_numbers(model, bases, known, max_length):
+    """Дополняет known занятыми номерами новых основ из базы."""
+    bases = list(bases)
+    for base in bases:
+        known[base] = TakenNumbers()
+    for start in range(0, len(bases), SLUG_QUERY_SIZE):
+        chunk = bases[start:start + SLUG_QUERY_SIZE]
+        for slug in taken_slugs(model._default_manager, chunk):
+            mark_taken(slug, known, max_length)
+
+
+def claim_user_slugs(model, notes, known, max_length):
+    """
+    Проверяет slug, указанные пользователем, и отмечает их в known.
+
+    Возвращает заметки, чей slug уже занят в базе или в пачке.
+    """
+    slugs = [note.slug for note in notes]
+    taken = set()
+    for start in range(0, len(slugs), SLUG_QUERY_SIZE):
+        taken |= taken_slugs(
+            model._default_manager, (), slugs[start:start + SLUG_QUERY_SIZE]
+        )
+    conflicts = []
+    for note in notes:
+        if note.slug in taken:
+            conflicts.append(note)
+            continue
+        taken.add(note.slug)
+        mark_taken(note.slug, known, max_length)
+    return conflicts
+
+
+def allocate_slugs(notes, known=None):
+    """
+    Подбирает свободные slug пачке новых заметок.
+
+    Заметкам без slug он строится по заголовку с номером при совпадении,
+    в том числе с другими заметками пачки. Возвращает заметки, чей
+    указанный пользователем slug занят; их сохранять нельзя.
+
+    known — словарь основа → TakenNumbers, общий для пачек одного
+    импорта: занятые варианты основы читаются из базы один раз, а не
+    заново в каждой пачке.
+    """
+    if not notes:
+        return []
+    known = {} if known is None else known
+    model = type(notes[0])
+    max_length = model._meta.get_field('slug').max_length
+    generated = [note for note in notes if not note.slug]
+    bases = slugify_many([note.title for note in generated], max_length)
+    read_taken_numbers(model, set(bases) - known.keys(), known, max_length)
+    conflicts = claim_user_slugs(
+        model, [note for note in notes if note.slug], known, max_length
+    )
+    for note, base in zip(generated, bases):
+        note.slug = numbered_slug(base, known[base].take(), max_length)
+        mark_taken(note.slug, known, max_length)
+    return conflicts
+
+
+def save_with_unique_slug(note, save, base=None):
+    """
+    Сохраняет заметку функцией save, занимая свободный slug.
+
+    Без base slug заметки считается выбранным пользователем и при
+    конфликте поднимается SlugTaken. Каждая попытка выполняется в своей
+    точке сохранения, чтобы ошибка не прерывала внешнюю транзакцию.
+    """
+    queryset = type(note)._default_manager.exclude(pk=note.pk)
+    max_length = type(note)._meta.get_field('slug').max_length
+    number = 1
+    for _ in range(SLUG_ATTEMPTS):
+        if base is not None:
+            note.slug = numbered_slug(base, number, max_length)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            taken = set()
+            if base is not None:
+                taken = taken_slugs(queryset, (base,))
+            if (
+                note.slug not in taken
+                and not queryset.filter(slug=note.slug).exists()
+            ):
+                raise
+            if base is None:
+                raise SlugTaken(note.slug)
+        number += 1
+        while numbered_slug(base, number, max_length) in taken:
+            number += 1
+    raise IntegrityError(
+        f'Не удалось подобрать свободный slug для «{base}».'
+    )
@@ -0,0 +1,168 @@
+"""
+Общая основа тестов заметок: данные из снимка базы и вход без записи.
+
+Функция наполнения (seed) создаёт пользователей и заметки один раз
+за процесс, после чего тестовая база SQLite копируется в память (снимок).
+Перед каждым классом SnapshotTestCase снимок переносится в тестовую базу
+через sqlite3 backup, а после класса база возвращается к снимку, снятому
+до наполнения. В снимок попадают и сессии пользователей, поэтому
+login_client ставит клиенту готовую cookie сессии вместо force_login,
+который на каждый тест пишет строку сессии и время входа.
+
+На других базах seed выполняется в setUpTestData, а клиенты входят
+через force_login.
+"""
+import sqlite3
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model,
+)
+from django.db import connection
+from django.test import Client, TestCase
+
+from notes.models import Note
+
+User = get_user_model()
+
+USERNAME = 'Пользователь'
+AUTHOR_USERNAME = 'Автор пользователь'
+TITLE = 'Заголовок'
+TEXT = 'Текст'
+# Сессии этих движков переживают перенос снимка: они хранятся в базе
+# или в самой cookie.
+SNAPSHOT_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+# Чтение сессии из базы: только движок db не держит сессию в кэше.
+SESSION_QUERIES = int(
+    settings.SESSION_ENGINE == settings.SESSION_ENGINES['db']
+)
+# Чтение пользователя из базы в каждом запросе: без общего кэша
+# настройки выбирают ModelBackend вместо CachedModelBackend.
+USER_QUERIES = int(
+    settings.AUTHENTICATION_BACKENDS
+    != ['yanote.sessions.CachedModelBackend']
+)
+
+# Снимки по функциям наполнения; под ключом None — база до наполнения.
+_snapshots = {}
+
+
+def seed_users():
+    """Пользователь и автор без заметок."""
+    return {
+        'user': User.objects.create(username=USERNAME),
+        'author_user': User.objects.create(username=AUTHOR_USERNAME),
+    }
+
+
+def seed_users_and_note():
+    """Пользователь с одной заметкой и автор без заметок."""
+    objects = seed_users()
+    objects['note'] = Note.objects.create(
+        author=objects['user'], title=TITLE, text=TEXT
+    )
+    return objects
+
+
+def create_session(user):
+    """Сохраняет сессию вошедшего user, как Client.force_login."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+class Snapshot:
+    """Копия тестовой базы в памяти с объектами и сессиями наполнения."""
+
+    def __init__(self, objects=None):
+        objects = objects or {}
+        self.objects = {
+            name: (type(instance), instance.pk)
+            for name, instance in objects.items()
+        }
+        self.sessions = {}
+        if settings.SESSION_ENGINE in SNAPSHOT_SESSION_ENGINES:
+            self.sessions = {
+                instance.pk: create_session(instance)
+                for instance in objects.values()
+                if isinstance(instance, User)
+            }
+        self.database = sqlite3.connect(':memory:', check_same_thread=False)
+        connection.ensure_connection()
+        connection.connection.backup(self.database)
+
+    def restore(self):
+        connection.ensure_connection()
+        self.database.backup(connection.connection)
+
+
+def get_snapshot(seed):
+    """Снимок базы после seed; строится при первом обращении."""
+    if seed not in _snapshots:
+        if None not in _snapshots:
+            _snapshots[None] = Snapshot()
+        _snapshots[seed] = Snapshot(seed())
+        _snapshots[None].restore()
+    return _snapshots[seed]
+
+
+class SnapshotTestCase(TestCase):
+    """
+    TestCase, данные которого берутся из снимка после seed.
+
+    Объекты, которые вернула seed, доступны как атрибуты класса
+    с теми же именами.
+    """
+
+    seed = staticmethod(seed_users_and_note)
+
+    @classmethod
+    def uses_snapshot(cls):
+        return connection.vendor == 'sqlite'
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.uses_snapshot():
+            cls.snapshot = get_snapshot(cls.seed)
+            cls.snapshot.restore()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if cls.uses_snapshot():
+            _snapshots[None].restore()
+
+    @classmethod
+    def setUpTestData(cls):
+        if not cls.uses_snapshot():
+            cls.snapshot = None
+            for name, instance in cls.seed().items():
+                setattr(cls, name, instance)
+            return
+        for name, (model, pk) in cls.snapshot.objects.items():
+            setattr(cls, name, model.objects.get(pk=pk))
+
+    def login_client(self, user, client=None):
+        """
+        Клиент (по умолчанию новый), вошедший как user.
+
+        Для пользователей из снимка ставится готовая cookie сессии,
+        для остальных выполняется force_login.
+        """
+        client = client or Client()
+        session_key = self.snapshot and self.snapshot.sessions.get(user.pk)
+        if session_key:
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        else:
+            client.force_login(user)
+        return client
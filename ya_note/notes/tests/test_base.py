@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from notes.models import Note
+from notes.tests.base import SnapshotTestCase, _snapshots
+
+User = get_user_model()
+
+
+class TestSnapshot(SnapshotTestCase):
+    """Класс TestSnapshot проверяет основу тестов со снимком базы"""
+
+    def count_notes(self, snapshot):
+        return snapshot.database.execute(
+            f'SELECT COUNT(*) FROM {Note._meta.db_table}'
+        ).fetchone()[0]
+
+    def test_class_gets_seeded_objects(self):
+        """Класс получает объекты наполнения из снимка."""
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Note.objects.get(), self.note)
+        self.assertEqual(self.note.author, self.user)
+        self.assertEqual(self.count_notes(_snapshots[None]), 0)
+        self.assertEqual(self.count_notes(self.snapshot), 1)
+
+    def test_login_client_does_not_touch_database(self):
+        """Вход по сессии из снимка не пишет в базу."""
+        with self.assertNumQueries(0):
+            client = self.login_client(self.author_user)
+        response = client.get(reverse('notes:list'))
+        self.assertEqual(response.context['user'], self.author_user)
+        self.assertNotIn(self.note, response.context['object_list'])
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.bulk import export_notes, import_notes
+from notes.factories import make_notes
+from yanote.benchmarks import logger
+
+User = get_user_model()
+
+BENCHMARK_NOTES_COUNT = 50_000
+REPEATS = 20
+BULK_NOTES_COUNT = 100_000
+BULK_DISTINCT_TITLES = 1000
+
+
+@unittest.skipUnless(
+    os.environ.get('BENCHMARK'), 'нагрузочный тест, запуск: BENCHMARK=1'
+)
+class TestLargeNotebook(TestCase):
+    """Класс TestLargeNotebook предназначен для замеров на 50 000 заметок"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Пользователь')
+        make_notes(
+            BENCHMARK_NOTES_COUNT, [cls.user],
+            text=lambda index: f'Текст заметки номер {index}',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def measure(self, params):
+        url = reverse('notes:list')
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            response = self.client.get(url, params)
+        elapsed = (time.perf_counter() - started) / REPEATS
+        logger.info(
+            f'{params or "первая страница"}: {elapsed * 1000:.1f} мс, '
+            f'{response["Server-Timing"]}'
+        )
+        return response
+
+    def test_list_and_search_do_not_scan_notebook(self):
+        """
+        Страницы списка и поиска читаются по индексам без сортировки
+        всех заметок пользователя.
+        """
+        cases = (
+            {},
+            {'after': BENCHMARK_NOTES_COUNT // 2},
+            {'q': 'номер'},
+            {'q': 'номер 4999'},
+        )
+        for params in cases:
+            with self.subTest(params=params):
+                self.measure(params)
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(reverse('notes:list'), params)
+                sql = context.captured_queries[-1]['sql']
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertNotIn('USE TEMP B-TREE', plan)
+                self.assertNotIn('SCAN notes_note ', f'{plan} ')
+
+
+@unittest.skipUnless(
+    os.environ.get('BENCHMARK'), 'нагрузочный тест, запуск: BENCHMARK=1'
+)
+class TestBulkThroughput(TestCase):
+    """Класс TestBulkThroughput замеряет скорость импорта и экспорта"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Пользователь')
+
+    def test_import_and_export_rows_per_second(self):
+        """Импорт и экспорт BULK_NOTES_COUNT заметок, строк в секунду."""
+        stream = StringIO(''.join(
+            json.dumps(
+                {
+                    'title': f'Заметка {index % BULK_DISTINCT_TITLES}',
+                    'text': f'Текст заметки номер {index}',
+                },
+                ensure_ascii=False,
+            ) + '\n'
+            for index in range(BULK_NOTES_COUNT)
+        ))
+        started = time.perf_counter()
+        result = import_notes(stream, author=self.user)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(result, (BULK_NOTES_COUNT, []))
+        logger.info(f'импорт: {BULK_NOTES_COUNT / elapsed:.0f} строк/с')
+        started = time.perf_counter()
+        count = export_notes(StringIO())
+        elapsed = time.perf_counter() - started
+        self.assertEqual(count, BULK_NOTES_COUNT)
+        logger.info(f'экспорт: {BULK_NOTES_COUNT / elapsed:.0f} строк/с')
@@ -0,0 +1,198 @@
+import json
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from pytils.translit import slugify
+
+from notes.bulk import NOT_OBJECT, export_notes, import_notes
+from notes.forms import WARNING
+from notes.models import Note
+from notes.search import search_notes
+
+User = get_user_model()
+
+
+def jsonl(*records):
+    return StringIO(''.join(
+        json.dumps(record, ensure_ascii=False) + '\n' for record in records
+    ))
+
+
+class TestBulkImport(TestCase):
+    """Класс TestBulkImport предназначен для тестирования импорта заметок"""
+
+    TITLE = 'Заголовок'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Пользователь')
+        cls.other_user = User.objects.create(username='Другой')
+
+    def test_import_allocates_slugs_in_batches(self):
+        """
+        Заметки с одинаковым заголовком получают разные slug, в том
+        числе в разных пачках и рядом с уже существующей заметкой.
+        """
+        Note.objects.create(author=self.user, title=self.TITLE, text='Т')
+        result = import_notes(
+            jsonl(*({'title': self.TITLE, 'text': 'Т'} for _ in range(5))),
+            author=self.user,
+            batch_size=2,
+        )
+        self.assertEqual(result, (5, []))
+        base = slugify(self.TITLE)
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {base} | {f'{base}-{number}' for number in range(2, 7)},
+        )
+
+    def test_import_skips_numbered_titles(self):
+        """Заголовок с числом на конце тоже не занимает чужой slug."""
+        Note.objects.create(author=self.user, title='Заметка 1', text='Т')
+        result = import_notes(
+            jsonl({'title': 'Заметка 1', 'text': 'Т'}), author=self.user
+        )
+        self.assertEqual(result, (1, []))
+        self.assertTrue(Note.objects.filter(
+            slug=f'{slugify("Заметка 1")}-2'
+        ).exists())
+
+    def test_import_numbers_long_titles(self):
+        """
+        Укороченные варианты длинных заголовков с общим началом
+        не занимают slug друг друга и уже сохранённых заметок.
+        """
+        titles = ['a' * 100, 'a' * 99 + 'b', 'a' * 95]
+        for title in titles:
+            Note.objects.create(author=self.user, title=title, text='Т')
+        result = import_notes(
+            jsonl(*(
+                {'title': title, 'text': 'Т'}
+                for title in titles for _ in range(12)
+            )),
+            author=self.user,
+            batch_size=5,
+        )
+        self.assertEqual(result, (36, []))
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), 39)
+        self.assertLessEqual(max(map(len, slugs)), 100)
+
+    def test_import_batch_queries(self):
+        """
+        Пачка сохраняется за постоянное число запросов: авторы, занятые
+        slug, вставка и версия списка автора в транзакции.
+        """
+        records = [
+            {'author': self.other_user.username, 'title': f'Заметка {index}',
+             'text': 'Т'}
+            for index in range(100)
+        ]
+        with self.assertNumQueries(7):
+            result = import_notes(jsonl(*records), batch_size=100)
+        self.assertEqual(result.created, 100)
+        self.assertEqual(
+            Note.objects.filter(author=self.other_user).count(), 100
+        )
+
+    def test_import_reports_invalid_records(self):
+        """Ошибочные записи пропускаются и попадают в отчёт."""
+        Note.objects.create(
+            author=self.user, title=self.TITLE, text='Т', slug='taken'
+        )
+        stream = StringIO(
+            '{"title": "Без текста"}\n'
+            'не JSON\n'
+            '{"author": "Нет такого", "title": "З", "text": "Т"}\n'
+            '{"title": "З", "text": "Т", "slug": "taken"}\n'
+            '{"title": "З", "text": "Т", "slug": "fresh"}\n'
+            '42\n'
+            '"строка"\n'
+            '[{"title": "З", "text": "Т"}]\n'
+        )
+        created, errors = import_notes(stream, author=self.user)
+        self.assertEqual(created, 1)
+        self.assertEqual(
+            [line for line, _ in errors], [1, 2, 3, 4, 6, 7, 8]
+        )
+        self.assertIn('text', errors[0][1])
+        self.assertEqual(errors[3][1], 'taken' + WARNING)
+        self.assertEqual(
+            [message for _, message in errors[4:]],
+            [NOT_OBJECT.format(type=name) for name in ('int', 'str', 'list')],
+        )
+
+    def test_import_updates_list_version_and_search(self):
+        """
+        Импорт меняет ETag списка заметок автора и попадает
+        в полнотекстовый поиск его заметок.
+        """
+        self.client.force_login(self.user)
+        etag = self.client.get(reverse('notes:list'))['ETag']
+        import_notes(
+            jsonl({'title': self.TITLE, 'text': 'Импортированный текст'}),
+            author=self.user,
+        )
+        response = self.client.get(
+            reverse('notes:list'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for author, count in ((self.user, 1), (self.other_user, 0)):
+            self.assertEqual(search_notes(
+                Note.objects.all(), 'импортированный', author_pk=author.pk
+            ).count(), count)
+
+    def test_export_round_trip(self):
+        """Выгрузка и повторная загрузка сохраняют заметки."""
+        for index in range(3):
+            Note.objects.create(
+                author=self.user, title=f'Заметка {index}', text='Т'
+            )
+        for format in ('jsonl', 'csv'):
+            with self.subTest(format=format):
+                stream = StringIO()
+                self.assertEqual(export_notes(stream, format), 3)
+                expected = list(
+                    Note.objects.values_list('author', 'title', 'text', 'slug')
+                )
+                Note.objects.all().delete()
+                stream.seek(0)
+                self.assertEqual(
+                    import_notes(stream, format), (3, [])
+                )
+                self.assertEqual(
+                    list(Note.objects.values_list(
+                        'author', 'title', 'text', 'slug'
+                    )),
+                    expected,
+                )
+
+    def test_import_and_export_commands(self):
+        """Команды import_notes и export_notes работают с файлами."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.csv'
+            path.write_text('title,text\nЗаметка,Текст\n', encoding='utf-8')
+            out = StringIO()
+            call_command(
+                'import_notes', str(path), author=self.user.username,
+                stdout=out,
+            )
+        self.assertIn('Создано заметок: 1, ошибок: 0', out.getvalue())
+        out = StringIO()
+        call_command('export_notes', stdout=out, stderr=StringIO())
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            {
+                'author': self.user.username,
+                'title': 'Заметка',
+                'text': 'Текст',
+                'slug': slugify('Заметка'),
+            },
+        )
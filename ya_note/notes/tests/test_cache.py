@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from yanote.cache import (
+    NamespacedCache, check_shared_cache, get_stats, stats,
+)
+
+User = get_user_model()
+
+
+@override_settings(CACHES={
+    'default': settings.CACHE_BACKENDS['memcached-standin'],
+})
+class TestNamespacedCache(SimpleTestCase):
+    """Класс TestNamespacedCache предназначен для тестирования кэша"""
+
+    def setUp(self):
+        stats.reset()
+        self.cache = NamespacedCache('auth')
+
+    def test_namespace_version_invalidates_keys(self):
+        """Увеличение версии пространства имён сбрасывает его ключи."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        with self.settings(CACHE_NAMESPACES={'auth': {'version': 2}}):
+            self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(
+            get_stats()['auth'], {'sets': 1, 'hits': 1, 'misses': 1}
+        )
+
+    def test_process_local_cache_is_reported(self):
+        """Проверка системы предупреждает о кэше в памяти одного процесса."""
+        for backend, warnings in (
+            ('memcached-standin', ['yanote.W001']),
+            ('locmem', ['yanote.W001']),
+            ('file', []),
+        ):
+            with self.subTest(backend=backend), self.settings(CACHES={
+                'default': settings.CACHE_BACKENDS[backend],
+            }):
+                self.assertEqual(
+                    [message.id for message in check_shared_cache(None)],
+                    warnings,
+                )
+
+
+class TestCacheStats(TestCase):
+    """Класс TestCacheStats предназначен для тестирования мониторинга кэша"""
+
+    def test_cache_stats_available_to_staff(self):
+        """Счётчики кэша доступны только сотрудникам."""
+        url = reverse('cache-stats')
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.FOUND)
+        admin = User.objects.create(username='Админ', is_staff=True)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
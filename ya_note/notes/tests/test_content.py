@@ -1,33 +1,24 @@
-from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from http import HTTPStatus
+
+from django.test import override_settings
 from django.urls import reverse
 
+from notes.factories import NOTE_TITLE, make_notes
 from notes.models import Note
+from notes.tests.base import (
+    SESSION_QUERIES, USER_QUERIES, SnapshotTestCase, seed_users,
+)
 
-User = get_user_model()
+NOTES_COUNT = 5
+SEARCH_TEXT = 'Купить молоко'
 
 
-class TestContent(TestCase):
+class TestContent(SnapshotTestCase):
     """Класс TestContent предназначен для тестирования контента"""
 
-    TITLE = 'Заголовок'
-    TEXT = 'Текст'
-
-    @classmethod
-    def setUpTestData(cls):
-        cls.user = User.objects.create(username='Пользователь')
-        cls.author_user = User.objects.create(username='Автор пользователь')
-        cls.note = Note.objects.create(
-            author=cls.user,
-            title=cls.TITLE,
-            text=cls.TEXT,
-        )
-
     def setUp(self):
-        self.user_client = Client()
-        self.user_client.force_login(self.user)
-        self.author_user_client = Client()
-        self.author_user_client.force_login(self.author_user)
+        self.user_client = self.login_client(self.user)
+        self.author_user_client = self.login_client(self.author_user)
 
     def test_note_passed_to_page_in_object_list(self):
         """
@@ -58,3 +49,114 @@ class TestContent(TestCase):
                 url = reverse(name, args=args)
                 response = self.user_client.get(url)
                 self.assertIn('form', response.context)
+
+
+def seed_notes_list():
+    """Пять заметок пользователя и по заметке про покупки у двоих."""
+    objects = seed_users()
+    make_notes(NOTES_COUNT, [objects['user']])
+    objects['note'] = Note.objects.create(
+        author=objects['user'], title='Покупки', text=SEARCH_TEXT
+    )
+    Note.objects.create(
+        author=objects['author_user'], title='Чужие покупки', text=SEARCH_TEXT
+    )
+    return objects
+
+
+class TestNotesList(SnapshotTestCase):
+    """Класс TestNotesList предназначен для тестирования списка заметок"""
+
+    seed = staticmethod(seed_notes_list)
+
+    def setUp(self):
+        self.login_client(self.user, self.client)
+
+    def search(self, query):
+        response = self.client.get(reverse('notes:list'), {'q': query})
+        return [note.pk for note in response.context['object_list']]
+
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test_notes_are_paginated_by_cursor(self):
+        """
+        Заметки выводятся страницами от новых к старым без повторов,
+        каждая страница стоит одинаковое число запросов.
+        """
+        url = reverse('notes:list')
+        pages, cursor = [], None
+        self.client.get(url)
+        while True:
+            # Сессия и пользователь, если они не в кэше, версия списка
+            # для ETag и сама страница.
+            with self.assertNumQueries(SESSION_QUERIES + USER_QUERIES + 2):
+                response = self.client.get(
+                    url, {'after': cursor} if cursor else {}
+                )
+            pages.append([note.pk for note in response.context['object_list']])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+        self.assertEqual(
+            sum(pages, []),
+            list(
+                Note.objects.filter(author=self.user)
+                .order_by('-pk').values_list('pk', flat=True)
+            ),
+        )
+
+    def test_invalid_cursor_is_rejected(self):
+        """Некорректный курсор отклоняется с ошибкой 400."""
+        response = self.client.get(reverse('notes:list'), {'after': 'abc'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_search_finds_own_notes(self):
+        """
+        Поиск находит заметки пользователя по началу слова без учёта
+        регистра и следит за изменением и удалением заметок.
+        """
+        self.assertEqual(self.search('МОЛОК'), [self.note.pk])
+        self.assertEqual(self.search('покупки'), [self.note.pk])
+        self.note.text = 'Купить хлеб'
+        self.note.save()
+        self.assertEqual(self.search('молоко'), [])
+        self.assertEqual(self.search('хлеб'), [self.note.pk])
+        self.note.delete()
+        self.assertEqual(self.search('хлеб'), [])
+
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test_search_is_paginated_within_own_notes(self):
+        """
+        Поиск выводится страницами по курсору и обходит только заметки
+        пользователя: чужие совпадения не занимают место на странице.
+        """
+        make_notes(NOTES_COUNT, [self.author_user])
+        pages, cursor = [], None
+        while True:
+            params = {'q': NOTE_TITLE, **({'after': cursor} if cursor else {})}
+            response = self.client.get(reverse('notes:list'), params)
+            pages.append([note.pk for note in response.context['object_list']])
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(
+            sum(pages, []),
+            list(
+                Note.objects.filter(
+                    author=self.user, title__startswith=NOTE_TITLE
+                ).order_by('-pk').values_list('pk', flat=True)
+            ),
+        )
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+    @override_settings(NOTES_FULL_TEXT_SEARCH=False)
+    def test_search_without_full_text_index(self):
+        """Без полнотекстового индекса поиск идёт по подстроке."""
+        self.assertEqual(self.search('молоко'), [self.note.pk])
+
+    def test_search_ignores_query_syntax(self):
+        """Операторы FTS5 в строке поиска не приводят к ошибке."""
+        for query in ('"', 'NEAR(молоко', 'молоко OR *', '-купить'):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('notes:list'), {'q': query})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from notes.factories import make_notes
+from notes.models import Note
+from yanote.factories import START, make_users
+
+
+class TestFactories(TestCase):
+    """Класс TestFactories проверяет фабрики тестовых данных"""
+
+    NOTES_COUNT = 6
+
+    def test_notes_are_built_in_few_queries(self):
+        """
+        Пользователи и заметки создаются пачкой: по несколько запросов
+        на таблицу, с детерминированными датами и уникальными slug. Новым
+        авторам создаются версии списков заметок.
+        """
+        Note.objects.create(
+            author=make_users(1).get(), title='Заметка', text='Т'
+        )
+        with self.assertNumQueries(8):
+            authors = list(make_users(2))
+            notes = list(make_notes(self.NOTES_COUNT, authors))
+        self.assertEqual(len(notes), self.NOTES_COUNT)
+        self.assertEqual(len({note.slug for note in notes}), len(notes))
+        self.assertEqual(
+            [note.updated for note in notes[:2]],
+            [START, START + timedelta(minutes=1)],
+        )
+        self.assertEqual(
+            Note.objects.filter(author=authors[0]).count(),
+            self.NOTES_COUNT // 2,
+        )
+
+    def test_notes_are_searchable(self):
+        """Заметки фабрики попадают в полнотекстовый индекс."""
+        user = make_users(1).get()
+        make_notes(
+            self.NOTES_COUNT, [user],
+            text=lambda index: f'Купить молоко {index}',
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse('notes:list'), {'q': 'молоко'})
+        self.assertEqual(
+            len(response.context['object_list']), self.NOTES_COUNT
+        )
@@ -1,18 +1,28 @@
+import threading
+import time
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
 from django.urls import reverse
 
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.slugs import (
+    SLUG_ATTEMPTS, STATS_GROUP, slugify_many, transliterate,
+)
+from notes.tests.base import (
+    SESSION_QUERIES, USER_QUERIES, SnapshotTestCase, seed_users,
+)
+from yanote.cache import get_stats, stats
 
 User = get_user_model()
 
 
-class TestLogic(TestCase):
+class TestLogic(SnapshotTestCase):
     """Класс TestLogic предназначен для тестирования логики"""
 
     NEW_TITLE = 'Новый заголовок'
@@ -20,10 +30,11 @@ class TestLogic(TestCase):
     TITLE = 'Заголовок'
     TEXT = 'Текст'
 
+    seed = staticmethod(seed_users)
+
     @classmethod
     def setUpTestData(cls):
-        cls.user = User.objects.create(username='Пользователь')
-        cls.author_user = User.objects.create(username='Автор пользователь')
+        super().setUpTestData()
         cls.data = {
             'slug': 'slug',
             'title': cls.NEW_TITLE,
@@ -31,10 +42,8 @@ class TestLogic(TestCase):
         }
 
     def setUp(self):
-        self.user_client = Client()
-        self.user_client.force_login(self.user)
-        self.author_user_client = Client()
-        self.author_user_client.force_login(self.author_user)
+        self.user_client = self.login_client(self.user)
+        self.author_user_client = self.login_client(self.author_user)
         super().setUp()
         self.note = None
 
@@ -148,3 +157,144 @@ class TestLogic(TestCase):
         response = self.author_user_client.post(url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), 1)
+
+
+class TestSlugAllocation(SnapshotTestCase):
+    """Класс TestSlugAllocation проверяет выбор уникального slug"""
+
+    TITLE = 'Заголовок'
+
+    seed = staticmethod(seed_users)
+
+    def setUp(self):
+        self.user_client = self.login_client(self.user)
+
+    def test_duplicate_titles_get_numbered_slugs(self):
+        """Заметки с одинаковым заголовком получают slug с номером."""
+        slugs = [
+            Note.objects.create(
+                author=self.user, title=self.TITLE, text='Текст'
+            ).slug
+            for _ in range(3)
+        ]
+        base = slugify(self.TITLE)
+        self.assertEqual(slugs, [base, f'{base}-2', f'{base}-3'])
+
+    def test_numbered_slug_fits_max_length(self):
+        """
+        Номер не выводит slug за пределы длины поля, а укороченные
+        варианты длинной основы учитываются как занятые.
+        """
+        title = 'я' * 100
+        slugs = [
+            Note.objects.create(author=self.user, title=title, text='Т').slug
+            for _ in range(SLUG_ATTEMPTS + 2)
+        ]
+        self.assertEqual(len(set(slugs)), SLUG_ATTEMPTS + 2)
+        self.assertEqual({len(slug) for slug in slugs}, {100})
+        self.assertTrue(slugs[1].endswith('-2'))
+        self.assertTrue(slugs[-1].endswith(f'-{SLUG_ATTEMPTS + 2}'))
+
+    def test_slugify_many_uses_cache(self):
+        """Повторные заголовки пачки берутся из кэша транслитерации."""
+        transliterate.cache_clear()
+        stats.reset()
+        titles = [self.TITLE, 'Другой заголовок', self.TITLE, self.TITLE]
+        self.assertEqual(
+            slugify_many(titles, 5),
+            [slugify(title)[:5] for title in titles],
+        )
+        self.assertEqual(
+            get_stats()[STATS_GROUP], {'hits': 2, 'misses': 2}
+        )
+
+    def test_form_creates_note_without_slug_check_query(self):
+        """
+        Создание заметки не проверяет slug отдельным запросом: кроме
+        сессии и пользователя, если они не в кэше, остаются вставка
+        и версия списка автора (у первой заметки она ещё и создаётся)
+        в точке сохранения транзакции.
+        """
+        self.user_client.get(reverse('notes:add'))
+        with self.assertNumQueries(SESSION_QUERIES + USER_QUERIES + 5):
+            response = self.user_client.post(
+                reverse('notes:add'), {'title': self.TITLE, 'text': 'Т'}
+            )
+        self.assertRedirects(response, reverse('notes:success'))
+        response = self.user_client.post(
+            reverse('notes:add'), {'title': self.TITLE, 'text': 'Т'}
+        )
+        self.assertRedirects(response, reverse('notes:success'))
+        self.assertTrue(
+            Note.objects.filter(slug=f'{slugify(self.TITLE)}-2').exists()
+        )
+
+    def test_edit_to_taken_slug_shows_warning(self):
+        """Занятый slug при редактировании — ошибка формы."""
+        Note.objects.create(
+            author=self.user, title=self.TITLE, text='Т', slug='taken'
+        )
+        note = Note.objects.create(author=self.user, title='Другая', text='Т')
+        response = self.user_client.post(
+            reverse('notes:edit', args=(note.slug,)),
+            {'title': 'Другая', 'text': 'Т', 'slug': 'taken'},
+        )
+        self.assertFormError(response, 'form', 'slug', 'taken' + WARNING)
+        note.refresh_from_db()
+        self.assertNotEqual(note.slug, 'taken')
+
+
+def create_retrying_locks(**fields):
+    """
+    Тестовая база в памяти с общим кэшем сразу отвечает «table is locked»
+    вместо ожидания, как busy_timeout у файловой базы; ждём сами.
+    """
+    while True:
+        try:
+            return Note.objects.create(**fields)
+        except OperationalError as error:
+            if 'locked' not in str(error) and 'vtable' not in str(error):
+                raise
+            time.sleep(0.001)
+
+
+class TestConcurrentSlugAllocation(TransactionTestCase):
+    """Параллельные вставки заметок с одинаковым заголовком"""
+
+    WRITERS = 8
+    NOTES_PER_WRITER = 10
+
+    def test_parallel_writers_get_distinct_slugs(self):
+        """Каждая заметка получает свой slug, ни одна вставка не теряется."""
+        user = User.objects.create(username='Пользователь')
+        barrier = threading.Barrier(self.WRITERS)
+        errors = []
+
+        def write():
+            try:
+                barrier.wait()
+                for _ in range(self.NOTES_PER_WRITER):
+                    create_retrying_locks(
+                        author=user, title='Заголовок', text='Текст'
+                    )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=write) for _ in range(self.WRITERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        total = self.WRITERS * self.NOTES_PER_WRITER
+        slugs = set(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), total)
+        base = slugify('Заголовок')
+        self.assertEqual(
+            slugs,
+            {base} | {f'{base}-{number}' for number in range(2, total + 1)},
+        )
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.tests.base import SESSION_QUERIES
+from yanote.middleware import QueryBudgetWarning
+
+User = get_user_model()
+
+
+class TestQueryBudget(TestCase):
+    """Класс TestQueryBudget предназначен для тестирования бюджета запросов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Пользователь')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        """В ответе есть заголовок Server-Timing с числом запросов к БД."""
+        response = self.client.get(reverse('notes:list'))
+        # Сессия, если она не в кэше, пользователь после входа, версия
+        # списка для ETag и страница.
+        queries = SESSION_QUERIES + 3
+        self.assertIn(f'desc="{queries} queries"', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    @override_settings(QUERY_BUDGETS={'notes:list': 1})
+    def test_query_budget_overrun_warns(self):
+        """Превышение бюджета запросов для маршрута вызывает предупреждение."""
+        with self.assertWarns(QueryBudgetWarning):
+            self.client.get(reverse('notes:list'))
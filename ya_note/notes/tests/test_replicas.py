@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.routers import PIN_COOKIE
+
+User = get_user_model()
+
+
+def replicate(*models):
+    """Копирует строки моделей из основной базы в реплику."""
+    for model in models:
+        model.objects.using('replica').all().delete()
+        model.objects.using('replica').bulk_create(
+            model.objects.using('default').all()
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class TestReplicaRouting(TestCase):
+    """Класс TestReplicaRouting проверяет чтение с реплики"""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='Пользователь')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        replicate(User, Session)
+
+    def test_reads_go_to_replica(self):
+        """Без изменяющего запроса список читает отстающую реплику."""
+        Note.objects.create(author=self.user, title='Заголовок', text='Т')
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(list(response.context['object_list']), [])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_user_reads_own_note_after_post(self):
+        """
+        После создания заметки пользователь читает основную базу
+        и видит её, пока не истечёт cookie закрепления.
+        """
+        response = self.client.post(
+            reverse('notes:add'), {'title': 'Заголовок', 'text': 'Т'}
+        )
+        self.assertGreater(response.cookies[PIN_COOKIE]['max-age'], 0)
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(
+            [note.title for note in response.context['object_list']],
+            ['Заголовок'],
+        )
+        del self.client.cookies[PIN_COOKIE]
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(list(response.context['object_list']), [])
@@ -1,35 +1,18 @@
 from http import HTTPStatus
 
-from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
 from django.urls import reverse
 
-from notes.models import Note
+from notes.tests.base import (
+    SESSION_QUERIES, USER_QUERIES, SnapshotTestCase,
+)
 
-User = get_user_model()
 
-
-class TestRoutes(TestCase):
+class TestRoutes(SnapshotTestCase):
     """Класс TestRoutes предназначен для тестирования маршрутов"""
 
-    TITLE = 'Заголовок'
-    TEXT = 'Текст'
-
-    @classmethod
-    def setUpTestData(cls):
-        cls.user = User.objects.create(username='Пользователь')
-        cls.author_user = User.objects.create(username='Автор пользователь')
-        cls.note = Note.objects.create(
-            author=cls.user,
-            title=cls.TITLE,
-            text=cls.TEXT,
-        )
-
     def setUp(self):
-        self.user_client = Client()
-        self.user_client.force_login(self.user)
-        self.author_user_client = Client()
-        self.author_user_client.force_login(self.author_user)
+        self.user_client = self.login_client(self.user)
+        self.author_user_client = self.login_client(self.author_user)
 
     def test_anonymous_user_page_access(self):
         """
@@ -111,3 +94,47 @@ class TestRoutes(TestCase):
                 redirect_url = f'{login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+class TestConditionalGet(SnapshotTestCase):
+    """Класс TestConditionalGet предназначен для тестирования ответов 304"""
+
+    def setUp(self):
+        self.login_client(self.user, self.client)
+
+    def test_notes_list_not_modified(self):
+        """
+        Список заметок с тем же ETag отдаётся ответом 304 без рендеринга,
+        удаление заметки меняет версию списка.
+        """
+        url = reverse('notes:list')
+        etag = self.client.get(url)['ETag']
+        # Сессия и пользователь, если они не в кэше, и версия списка
+        # по первичному ключу.
+        with self.assertNumQueries(SESSION_QUERIES + USER_QUERIES + 1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.templates)
+        self.note.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_note_detail_not_modified(self):
+        """
+        Страница заметки отдаёт ETag и Last-Modified, изменение заметки
+        меняет обе метки.
+        """
+        url = reverse('notes:detail', args=(self.note.slug,))
+        response = self.client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.note.text = 'Новый текст'
+        self.note.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,161 @@
+import os
+import runpy
+import tempfile
+import time
+import unittest
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.factories import make_notes
+from notes.tests.base import SnapshotTestCase
+from yanote import sessions
+from yanote import settings as project_settings
+from yanote.benchmarks import QUERIES, logger
+from yanote.cache import NamespacedCache
+from yanote.sessions import CachedModelBackend
+
+NOTES_COUNT = 1000
+THROUGHPUT_REQUESTS = 300
+# Было: сессия и пользователь из базы; стало: движки сессий
+# с пользователем из кэша.
+SESSION_SETUPS = (
+    ('db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached-db', 'yanote.sessions.CachedModelBackend'),
+    ('signed-cookies', 'yanote.sessions.CachedModelBackend'),
+)
+
+
+class TestSessions(SnapshotTestCase):
+    """Класс TestSessions проверяет кэш пользователя сессии"""
+
+    def test_user_is_read_from_cache(self):
+        """Пользователь сессии читается из базы один раз."""
+        # Сохранение сбрасывает пользователя в кэше.
+        self.user.save()
+        backend = CachedModelBackend()
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+            self.assertEqual(backend.get_user(self.user.pk), self.user)
+
+    def test_user_change_reaches_other_process(self):
+        """
+        Сохранение пользователя сбрасывает его в кэше другого процесса
+        только при общем кэше. Процессы изображают два экземпляра кэша:
+        file на одном каталоге или locmem с разными LOCATION.
+        """
+        backend = CachedModelBackend()
+        for cache_backend, other_location, shared in (
+            ('file', '', True), ('locmem', 'other', False),
+        ):
+            with tempfile.TemporaryDirectory() as location, self.subTest(
+                backend=cache_backend
+            ), self.settings(CACHES={
+                alias: {
+                    **settings.CACHE_BACKENDS[cache_backend],
+                    'LOCATION': f'{location}{suffix}',
+                }
+                for alias, suffix in (
+                    ('default', ''), ('other', other_location)
+                )
+            }):
+                with mock.patch.object(
+                    sessions, 'auth_cache',
+                    NamespacedCache('auth', alias='other'),
+                ):
+                    backend.get_user(self.user.pk)
+                self.user.username = f'Новое имя {cache_backend}'
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.user.save()
+                with mock.patch.object(
+                    sessions, 'auth_cache',
+                    NamespacedCache('auth', alias='other'),
+                ):
+                    user = backend.get_user(self.user.pk)
+                self.assertIs(user.username == self.user.username, shared)
+
+    def test_password_change_ends_other_sessions(self):
+        """
+        Смена пароля сбрасывает пользователя в кэше, и остальные
+        сессии пользователя завершаются.
+        """
+        client = self.login_client(self.user)
+        url = reverse('notes:list')
+        self.assertEqual(client.get(url).status_code, HTTPStatus.OK)
+        self.user.set_password('Новый пароль')
+        self.user.save()
+        response = client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(response.url.startswith(reverse('users:login')))
+
+
+class TestSessionDefaults(SimpleTestCase):
+    """Класс TestSessionDefaults проверяет настройки сессий по умолчанию"""
+
+    def test_session_defaults_follow_cache(self):
+        """Сессии и пользователь берутся из кэша, только если он общий."""
+        model_backend = 'django.contrib.auth.backends.ModelBackend'
+        cached_backend = 'yanote.sessions.CachedModelBackend'
+        for cache_backend, session_engine, auth_backend in (
+            ('locmem', 'db', model_backend),
+            ('memcached-standin', 'db', model_backend),
+            ('file', 'cached_db', cached_backend),
+            ('memcached', 'cached_db', cached_backend),
+        ):
+            environ = {
+                key: value for key, value in os.environ.items()
+                if key != 'SESSION_BACKEND'
+            }
+            environ['CACHE_BACKEND'] = cache_backend
+            with self.subTest(backend=cache_backend), mock.patch.dict(
+                os.environ, environ, clear=True
+            ):
+                values = runpy.run_path(project_settings.__file__)
+            self.assertTrue(values['SESSION_ENGINE'].endswith(session_engine))
+            self.assertEqual(
+                values['AUTHENTICATION_BACKENDS'], [auth_backend]
+            )
+
+
+@unittest.skipUnless(
+    os.environ.get('BENCHMARK'), 'нагрузочный тест, запуск: BENCHMARK=1'
+)
+class TestAuthenticatedThroughput(SnapshotTestCase):
+    """Класс TestAuthenticatedThroughput замеряет авторизованные запросы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        make_notes(NOTES_COUNT, [cls.author_user])
+
+    def test_authenticated_throughput(self):
+        """
+        С сессией и пользователем из кэша авторизованный запрос
+        обходится без обращений к базе за ними.
+        """
+        url = reverse('notes:list')
+        queries = {}
+        for engine, backend in SESSION_SETUPS:
+            with override_settings(
+                SESSION_ENGINE=settings.SESSION_ENGINES[engine],
+                AUTHENTICATION_BACKENDS=[backend],
+            ):
+                client = Client()
+                client.force_login(self.author_user)
+                client.get(url)
+                started = time.perf_counter()
+                for _ in range(THROUGHPUT_REQUESTS):
+                    response = client.get(url)
+                elapsed = time.perf_counter() - started
+            queries[engine] = int(
+                QUERIES.search(response['Server-Timing']).group(1)
+            )
+            logger.info(
+                f'{engine}: {THROUGHPUT_REQUESTS / elapsed:.0f} '
+                f'запросов/с, {queries[engine]} запросов к базе'
+            )
+        self.assertEqual(queries['cached-db'], queries['signed-cookies'])
+        self.assertEqual(queries['cached-db'], queries['db'] - 2)
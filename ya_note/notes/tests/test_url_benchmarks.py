@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+import unittest
+from http import HTTPStatus
+from pathlib import Path
+from unittest import mock
+
+from django.test import Client, LiveServerTestCase, SimpleTestCase
+from django.urls import reverse
+
+from notes.factories import make_notes
+from notes.models import Note
+from yanote.benchmarks import (
+    Case, Result, check_baseline, compare, format_results, logger, run_cases,
+)
+from yanote.factories import make_users
+
+BASELINE = Path(__file__).with_name('benchmark_baseline.json')
+USERS_COUNT = 20
+NOTES_COUNT = 10_000
+
+
+class TestCompare(SimpleTestCase):
+    """Класс TestCompare проверяет сравнение с базовой линией"""
+
+    def test_compare_reports_only_regressions(self):
+        """
+        Регрессия — лишний запрос или время и память сверх допусков;
+        страницы без базовой линии и неизвестное число запросов
+        не сравниваются.
+        """
+        baseline = {'wsgi': {'notes:list': Result(10, 20, 2, 100)._asdict()}}
+        within_limits = {'wsgi': {'notes:list': Result(20, 65, 2, 189)}}
+        self.assertEqual(compare(within_limits, baseline), [])
+        streaming = {'wsgi': {'notes:list': Result(10, 20, None, 100)}}
+        self.assertEqual(compare(streaming, baseline), [])
+        regressions = compare(
+            {
+                'wsgi': {'notes:list': Result(21, 66, 3, 190)},
+                'in-process': {'notes:list': Result(100, 100, 10, 1000)},
+            },
+            baseline,
+        )
+        self.assertEqual(len(regressions), 4)
+
+    def test_timings_are_compared_only_on_request(self):
+        """
+        В базовую линию репозитория записывается только число запросов,
+        время и память сравниваются с файлом из BENCHMARK_TIMINGS.
+        """
+        environ = mock.patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        for name in ('BENCHMARK_TIMINGS', 'BENCHMARK_UPDATE_BASELINE'):
+            os.environ.pop(name, None)
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        directory = Path(temporary.name)
+        baseline = directory / 'baseline.json'
+        faster = {'wsgi': {'notes:list': Result(10, 20, 2, 100)}}
+        slower = {'wsgi': {'notes:list': Result(100, 200, 2, 1000)}}
+        check_baseline(faster, baseline)
+        self.assertEqual(
+            json.loads(baseline.read_text()),
+            {'wsgi': {'notes:list': {'queries': 2}}},
+        )
+        self.assertEqual(check_baseline(slower, baseline), [])
+        os.environ['BENCHMARK_TIMINGS'] = str(directory / 'timings.json')
+        check_baseline(faster, baseline)
+        self.assertEqual(len(check_baseline(slower, baseline)), 3)
+
+
+@unittest.skipUnless(
+    os.environ.get('BENCHMARK'), 'нагрузочный тест, запуск: BENCHMARK=1'
+)
+class TestUrlBenchmarks(LiveServerTestCase):
+    """Класс TestUrlBenchmarks замеряет все страницы на 10 000 заметок"""
+
+    def setUp(self):
+        self.users = list(make_users(USERS_COUNT))
+        make_notes(
+            NOTES_COUNT, self.users,
+            text=lambda index: f'Текст заметки номер {index}',
+        )
+
+    def url_cases(self):
+        """Все страницы notes.urls и auth/ с ожидаемыми статусами ответа."""
+        author = self.users[0]
+        slug = Note.objects.filter(author=author).values_list(
+            'slug', flat=True
+        ).first()
+        return (
+            Case('notes:home', reverse('notes:home'), None, HTTPStatus.OK),
+            Case('notes:add', reverse('notes:add'), author, HTTPStatus.OK),
+            Case(
+                'notes:edit', reverse('notes:edit', args=(slug,)),
+                author, HTTPStatus.OK,
+            ),
+            Case(
+                'notes:detail', reverse('notes:detail', args=(slug,)),
+                author, HTTPStatus.OK,
+            ),
+            Case(
+                'notes:delete', reverse('notes:delete', args=(slug,)),
+                author, HTTPStatus.OK,
+            ),
+            Case('notes:list', reverse('notes:list'), author, HTTPStatus.OK),
+            Case(
+                'notes:success', reverse('notes:success'),
+                author, HTTPStatus.OK,
+            ),
+            Case('users:login', reverse('users:login'), None, HTTPStatus.OK),
+            Case(
+                'users:logout', reverse('users:logout'), None, HTTPStatus.OK
+            ),
+            Case(
+                'users:signup', reverse('users:signup'), None, HTTPStatus.OK
+            ),
+        )
+
+    @staticmethod
+    def make_client(user):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def test_pages_do_not_regress(self):
+        """
+        Число запросов каждой страницы в процессе и через WSGI-сервер
+        не больше базовой линии, время ответа и пик памяти не хуже
+        замеров из BENCHMARK_TIMINGS.
+        """
+        results, errors = run_cases(
+            self.url_cases(), self.make_client, self.live_server_url
+        )
+        logger.info(f'{format_results(results)}')
+        self.assertEqual(errors, [])
+        regressions = check_baseline(results, BASELINE)
+        self.assertFalse(regressions, '\n'.join(regressions))
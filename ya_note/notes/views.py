@@ -1,9 +1,43 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from yanote.conditional import conditional_get, make_etag, per_request
+
+from .forms import WARNING, NoteForm
+from .models import Note, NoteListVersion
+from .pagination import decode_cursor, get_notes_page
+from .search import search_notes
+from .slugs import SlugTaken
+
+
+def notes_list_etag(request):
+    """
+    Версия списка заметок пользователя: счётчик NoteListVersion, который
+    меняется при каждом сохранении и удалении заметки. Читается одной
+    строкой по первичному ключу, так что её видят все процессы сервера.
+    Страница и строка поиска берутся из параметров запроса.
+    """
+    return make_etag(
+        request, NoteListVersion.get(request.user.pk),
+        request.GET.urlencode(),
+    )
+
+
+@per_request
+def note_updated(request, slug):
+    """Время изменения заметки пользователя или None, если её нет."""
+    return Note.objects.filter(author=request.user, slug=slug).values_list(
+        'updated', flat=True
+    ).first()
+
+
+def note_etag(request, slug):
+    updated = note_updated(request, slug)
+    if updated is None:
+        return None
+    return make_etag(request, updated)
 
 
 class Home(generic.TemplateView):
@@ -29,25 +63,31 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Занятый slug, указанный пользователем, — ошибка поля формы."""
 
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        try:
+            return super().form_valid(form)
+        except SlugTaken as error:
+            form.add_error('slug', error.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
 
-    template_name = 'notes/form.html'
-    form_class = NoteForm
-
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
@@ -60,8 +100,38 @@ class NotesList(NoteBase, generic.ListView):
 
     template_name = 'notes/list.html'
 
+    @conditional_get(etag_func=notes_list_etag, private=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """Страница заметок по строке поиска q после курсора after."""
+        notes = super().get_queryset()
+        self.query = self.request.GET.get('q', '').strip()
+        cursor = self.request.GET.get('after')
+        if self.query:
+            notes = search_notes(
+                notes, self.query, author_pk=self.request.user.pk,
+                before=decode_cursor(cursor) if cursor else None,
+                limit=settings.NOTES_PAGE_SIZE + 1,
+            )
+        notes, self.next_cursor = get_notes_page(notes, cursor=cursor)
+        return notes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['next_cursor'] = self.next_cursor
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
 
     template_name = 'notes/detail.html'
+
+    @conditional_get(
+        etag_func=note_etag, last_modified_func=note_updated, private=True
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,202 @@
+"""
+Кэширующая подсистема проекта.
+
+Бэкенд выбирается в настройках (CACHE_BACKEND), приложения работают с кэшем
+через пространства имён NamespacedCache: ключи получают префикс приложения
+и версию из CACHE_NAMESPACES. Счётчики попаданий, промахов и вытеснений
+доступны через get_stats() и страницу cache-stats/.
+
+Сессии cached-db и пользователи CachedModelBackend удаляются из кэша при
+выходе и смене пароля, поэтому при нескольких рабочих процессах кэш
+должен быть общим (file или memcached); проверка check_shared_cache
+предупреждает об обратном.
+"""
+import pickle
+import random
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import (
+    DEFAULT_TIMEOUT, InvalidCacheKey, memcache_key_warnings,
+)
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import JsonResponse
+
+MEMCACHED_MAX_VALUE_SIZE = 1024 * 1024
+# Бэкенды, ключи которых видны только своему процессу.
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+class CacheStats:
+    """Потокобезопасные счётчики кэша, общие для процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(Counter)
+
+    def incr(self, group, event, count=1):
+        with self._lock:
+            self._counters[group][event] += count
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                group: dict(counter)
+                for group, counter in self._counters.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
+
+
+def get_stats():
+    """Снимок счётчиков: пространства имён и вытеснения по бэкендам."""
+    return stats.as_dict()
+
+
+class CountingLocMemCache(LocMemCache):
+    """Кэш в памяти процесса, считающий вытесненные записи."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._name = name
+
+    def _cull(self):
+        count = len(self._cache)
+        super()._cull()
+        stats.incr(f'backend:{self._name}', 'evictions',
+                   count - len(self._cache))
+
+
+class CountingFileBasedCache(FileBasedCache):
+    """Файловый кэш, считающий вытесненные записи."""
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            evicted = num_entries
+        else:
+            filelist = random.sample(
+                filelist, int(num_entries / self._cull_frequency)
+            )
+            for fname in filelist:
+                self._delete(fname)
+            evicted = len(filelist)
+        stats.incr(f'backend:{self._dir}', 'evictions', evicted)
+
+
+class MemcachedStandInCache(CountingLocMemCache):
+    """
+    Локальная замена memcached для разработки и тестов.
+
+    Хранит данные в памяти процесса, но проверяет ключи и размер значений
+    так же, как memcached, чтобы ошибки проявлялись до выкладки.
+    """
+
+    def validate_key(self, key):
+        for warning in memcache_key_warnings(key):
+            raise InvalidCacheKey(warning)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self._fits(value):
+            return False
+        return super().add(key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._fits(value):
+            super().set(key, value, timeout, version)
+
+    def _fits(self, value):
+        size = len(pickle.dumps(value, self.pickle_protocol))
+        return size <= MEMCACHED_MAX_VALUE_SIZE
+
+
+def is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """Видят ли все процессы сервера одни и те же ключи кэша alias."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Предупреждает, что сбросы через кэш не дойдут до других процессов."""
+    if is_shared():
+        return []
+    return [checks.Warning(
+        f'Кэш {type(caches[DEFAULT_CACHE_ALIAS]).__name__} виден только '
+        f'своему процессу.',
+        hint=(
+            'Сессии и пользователи сессий удаляются из кэша при выходе '
+            'и смене пароля, другие рабочие процессы сервера этого '
+            'не увидят. При нескольких процессах задайте '
+            'CACHE_BACKEND=file или memcached.'
+        ),
+        id='yanote.W001',
+    )]
+
+
+class NamespacedCache:
+    """
+    Кэш приложения с собственным пространством имён.
+
+    Версия пространства берётся из CACHE_NAMESPACES: её увеличение
+    делает недействительными все ключи приложения сразу.
+    """
+
+    def __init__(self, namespace, alias=DEFAULT_CACHE_ALIAS):
+        self.namespace = namespace
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    @property
+    def options(self):
+        return settings.CACHE_NAMESPACES.get(self.namespace, {})
+
+    @property
+    def version(self):
+        return self.options.get('version', 1)
+
+    def make_key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def _timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return self.options.get('timeout', DEFAULT_TIMEOUT)
+        return timeout
+
+    def get(self, key, default=None):
+        value = self.backend.get(self.make_key(key), version=self.version)
+        stats.incr(self.namespace, 'misses' if value is None else 'hits')
+        return default if value is None else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        stats.incr(self.namespace, 'sets')
+        self.backend.set(
+            self.make_key(key), value, self._timeout(timeout),
+            version=self.version,
+        )
+
+    def delete(self, key):
+        return self.backend.delete(self.make_key(key), version=self.version)
+
+
+@staff_member_required
+def stats_view(request):
+    """Счётчики кэша текущего процесса для мониторинга."""
+    return JsonResponse(get_stats())
@@ -0,0 +1,122 @@
+"""
+Учёт запросов к базе данных для каждого HTTP-запроса.
+
+QueryBudgetMiddleware считает запросы ко всем базам, их суммарное время,
+повторяющиеся запросы (признак N+1) и время рендеринга шаблона. Цифры
+отдаются в заголовке Server-Timing и пишутся в журнал одной JSON-строкой.
+Если число запросов превышает бюджет из QUERY_BUDGETS для имени маршрута,
+выдаётся предупреждение QueryBudgetWarning; в тестах оно превращается
+в ошибку через filterwarnings в pytest.ini. Фильтр ищет предупреждение
+по тексту BUDGET_EXCEEDED: pytest разбирает pytest.ini раньше, чем
+пакет проекта становится доступен для импорта.
+"""
+import json
+import logging
+import time
+import warnings
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# По этому тексту предупреждение находит filterwarnings в pytest.ini.
+BUDGET_EXCEEDED = (
+    '{view}: {count} запросов к БД при бюджете {budget}. '
+    'Повторяющиеся запросы: {duplicates}'
+)
+
+
+class QueryBudgetWarning(UserWarning):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, считающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """Запросы, повторённые не реже QUERY_DUPLICATE_THRESHOLD раз."""
+        return {
+            sql: count for sql, count in self.statements.items()
+            if count >= settings.QUERY_DUPLICATE_THRESHOLD
+        }
+
+
+@contextmanager
+def recording(recorder):
+    """Передаёт recorder запросы ко всем базам, выполненные в блоке."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.template_render_time = 0.0
+        started = time.perf_counter()
+        with recording(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries"',
+            f'tpl;dur={request.template_render_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        self.report(request, response, recorder, total)
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.template_render_time = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, recorder, total):
+        match = request.resolver_match
+        view = match.view_name if match else None
+        duplicates = recorder.duplicates()
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'template_ms': round(request.template_render_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'duplicates': len(duplicates),
+        }, ensure_ascii=False))
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is not None and recorder.count > budget:
+            warnings.warn(BUDGET_EXCEEDED.format(
+                view=view,
+                count=recorder.count,
+                budget=budget,
+                duplicates=list(duplicates.values()),
+            ), QueryBudgetWarning)
@@ -0,0 +1,72 @@
+"""
+Чтение с реплик, запись в основную базу.
+
+ReplicaRouter отправляет запись в default, а чтение — в одну из баз
+DATABASE_REPLICAS. Реплика отстаёт от основной базы, поэтому после
+изменяющего запроса (POST и другие небезопасные методы)
+PrimaryAfterWriteMiddleware ставит cookie на REPLICA_PIN_SECONDS: пока она
+есть, запросы этого пользователя читают из default и видят собственные
+изменения, например новую заметку в списке после редиректа.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+@contextmanager
+def pin_to_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Связанные объекты читаются из той же базы, что и сам объект.
+            return instance._state.db
+        if _pinned.get() or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Все базы из DATABASES — копии одной и той же базы."""
+        return True
+
+
+class PrimaryAfterWriteMiddleware:
+    """Закрепляет чтение за основной базой после изменяющего запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method not in SAFE_METHODS
+        if not (writes or PIN_COOKIE in request.COOKIES):
+            return self.get_response(request)
+        with pin_to_primary():
+            response = self.get_response(request)
+        if writes:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
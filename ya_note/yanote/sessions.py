@@ -0,0 +1,52 @@
+"""
+Пользователь авторизованного запроса из кэша.
+
+Движок сессий выбирается в настройках (SESSION_BACKEND). Чтобы запрос
+не ходил в базу и за пользователем, бэкенд аутентификации
+CachedModelBackend хранит пользователя в пространстве имён кэша 'auth'.
+Сохранение или удаление пользователя удаляет его из кэша. Поэтому после
+смены пароля django.contrib.auth.get_user сравнивает хэш из сессии уже
+с новым паролем и завершает остальные сессии пользователя.
+
+Сброс виден только процессам с тем же кэшем: с кэшем в памяти процесса
+остальные рабочие процессы продолжали бы отдавать старого пользователя.
+Поэтому настройки включают CachedModelBackend и сессии в кэше
+по умолчанию только при общем кэше (SHARED_CACHE_BACKENDS).
+
+Приложение подключает обработчики сигналов, импортируя модуль в ready().
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import NamespacedCache
+
+USER_KEY = 'user:{pk}'
+
+auth_cache = NamespacedCache('auth')
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который читает пользователя сессии из кэша."""
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(pk=user_id)
+        user = auth_cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                auth_cache.set(key, user)
+        return user
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает пользователя в кэше сразу и после фиксации транзакции:
+    параллельный запрос мог успеть положить туда старую версию.
+    """
+    key = USER_KEY.format(pk=instance.pk)
+    auth_cache.delete(key)
+    transaction.on_commit(lambda: auth_cache.delete(key))
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.QueryBudgetMiddleware',
+    'yanote.routers.PrimaryAfterWriteMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,15 +54,116 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
+DB_REPLICA_NAME = os.getenv('DB_REPLICA_NAME')
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Реплика основной базы только для чтения, путь к ней задаётся
+    # переменной окружения DB_REPLICA_NAME. В тестах это отдельная пустая
+    # база: данные в неё копируются явно, как это сделала бы репликация.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': DB_REPLICA_NAME or BASE_DIR / 'db.sqlite3',
+    },
+}
+
+# Режим «SQLite в продакшене» (yanote.sqlite_backend): WAL и настроенные
+# PRAGMA, BEGIN IMMEDIATE для записи и постоянные соединения
+# с проверкой при первом обращении к базе в запросе. Включается
+# переменной окружения SQLITE_PRODUCTION=1.
+if os.getenv('SQLITE_PRODUCTION'):
+    for database in DATABASES.values():
+        database['ENGINE'] = 'yanote.sqlite_backend'
+        database['CONN_MAX_AGE'] = 600
+
+# Чтение идёт с реплик из DATABASE_REPLICAS, запись — в default,
+# см. yanote.routers. Без DB_REPLICA_NAME или если он указывает на файл
+# основной базы, реплик нет и всё читается из default.
+DATABASE_ROUTERS = ['yanote.routers.ReplicaRouter']
+DATABASE_REPLICAS = (
+    ['replica']
+    if DB_REPLICA_NAME
+    and Path(DB_REPLICA_NAME).resolve() != DATABASES['default']['NAME']
+    else []
+)
+# Сколько секунд после изменяющего запроса пользователь читает
+# из основной базы: должно покрывать отставание реплики.
+REPLICA_PIN_SECONDS = 5
+
+# Бэкенд кэша выбирается переменной окружения CACHE_BACKEND.
+# memcached-standin хранит данные в памяти процесса, но проверяет ключи
+# и размер значений как memcached: подходит для тестов и разработки.
+# locmem и memcached-standin видны только своему процессу, а через кэш
+# расходятся выход и смена пароля: при нескольких рабочих процессах
+# нужен file или memcached (manage.py check предупреждает, yanote.W001).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+# Бэкенды, общие для всех рабочих процессов сервера.
+SHARED_CACHE_BACKENDS = ('file', 'memcached')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'yanote.cache.CountingLocMemCache',
+        'LOCATION': 'yanote',
+    },
+    'file': {
+        'BACKEND': 'yanote.cache.CountingFileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / '.cache'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+    'memcached-standin': {
+        'BACKEND': 'yanote.cache.MemcachedStandInCache',
+        'LOCATION': 'yanote-memcached',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'yanote',
+    },
+}
+
+# Пространства имён приложений: увеличение version сбрасывает все ключи.
+CACHE_NAMESPACES = {
+    'auth': {'version': 1, 'timeout': 15 * 60},
 }
 
 
+# Движок сессий выбирается переменной окружения SESSION_BACKEND.
+# cached-db читает сессию из кэша, а сохраняет и в кэш, и в базу;
+# signed-cookies хранит сессию в подписанной cookie и не обращается
+# к базе, но такую сессию нельзя завершить на сервере, кроме как
+# сменой пароля или SECRET_KEY.
+# Выход и смена пароля сбрасывают сессию и пользователя только в кэше
+# своего процесса, поэтому без общего кэша по умолчанию сессии и
+# пользователи читаются из базы.
+SESSION_BACKEND = os.getenv(
+    'SESSION_BACKEND',
+    'cached-db' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else 'db',
+)
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached-db': 'django.contrib.sessions.backends.cached_db',
+    'signed-cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+# При общем кэше пользователь сессии читается из кэша, см. yanote.sessions.
+AUTHENTICATION_BACKENDS = [
+    'yanote.sessions.CachedModelBackend'
+    if CACHE_BACKEND in SHARED_CACHE_BACKENDS
+    else 'django.contrib.auth.backends.ModelBackend'
+]
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -87,3 +191,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PAGE_SIZE = 50
+
+# Полнотекстовый поиск заметок через SQLite FTS5; без него или на других
+# базах данных поиск идёт по подстроке.
+NOTES_FULL_TEXT_SEARCH = True
+
+# Бюджеты запросов к БД по имени маршрута, учитываются
+# yanote.middleware.QueryBudgetMiddleware. Включают чтение сессии
+# и пользователя для авторизованных запросов. Список и заметка
+# дополнительно читают свою версию для ETag. Заметка сохраняется в точке
+# сохранения транзакции (notes.slugs) вместе с версией списка автора,
+# для первой заметки автора версия ещё и создаётся. При занятом slug
+# добавляются откат, чтение занятых вариантов и повторная вставка.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 4,
+    'notes:detail': 4,
+    'notes:add': 12,
+    'notes:edit': 9,
+    'notes:delete': 5,
+    'notes:success': 2,
+}
+
+# С какого числа повторов одинаковый запрос считается признаком N+1.
+QUERY_DUPLICATE_THRESHOLD = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanote.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yanote.benchmarks': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}